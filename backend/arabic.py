@@ -0,0 +1,41 @@
+"""
+Arabic text normalization for Palestine Martyrs API
+Folds spelling variants so names match regardless of how they were typed
+"""
+
+import re
+import unicodedata
+
+# Harakat, tanween, shadda, sukun, superscript alef and Quranic marks
+_DIACRITICS = re.compile("[\u0610-\u061a\u064b-\u065f\u0670\u06d6-\u06ed]")
+_TATWEEL = "\u0640"
+
+_FOLDING = str.maketrans({
+    "\u0622": "\u0627",  # آ -> ا
+    "\u0623": "\u0627",  # أ -> ا
+    "\u0625": "\u0627",  # إ -> ا
+    "\u0671": "\u0627",  # ٱ -> ا
+    "\u0649": "\u064a",  # ى -> ي
+    "\u0626": "\u064a",  # ئ -> ي
+    "\u0624": "\u0648",  # ؤ -> و
+    "\u0629": "\u0647",  # ة -> ه
+    "\u06cc": "\u064a",  # Persian ya -> ي
+    "\u06a9": "\u0643",  # Persian kaf -> ك
+})
+
+_NON_WORD = re.compile(r"[^\w]+")
+
+
+def normalize_arabic(text: str) -> str:
+    """Fold alef/ya/ta-marbuta variants, strip diacritics and tatweel, lowercase"""
+    if not text:
+        return ""
+    text = unicodedata.normalize("NFKC", text)
+    text = _DIACRITICS.sub("", text).replace(_TATWEEL, "")
+    text = text.translate(_FOLDING).lower()
+    return " ".join(_NON_WORD.sub(" ", text).split())
+
+
+def build_search_text(*parts) -> str:
+    """Normalized text indexed for a record: its names joined by spaces"""
+    return " ".join(filter(None, (normalize_arabic(part) for part in parts if part)))
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Concurrency latency benchmark
+Hammers an authenticated listing endpoint and reports throughput and p50/p95/p99
+
+Run it against a server built from each revision to compare, e.g.:
+    python benchmarks/bench_concurrency.py http://localhost:8000 --path /martyrs --concurrency 64
+"""
+
+import argparse
+import asyncio
+import time
+
+import httpx
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def worker(client, path, headers, deadline, samples, errors):
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        response = await client.get(path, headers=headers)
+        if response.status_code == 200:
+            samples.append((time.perf_counter() - start) * 1000)
+        else:
+            errors.append(response.status_code)
+
+
+async def run(args):
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=60) as client:
+        login = await client.post(
+            "/auth/login", json={"username": args.username, "password": args.password}
+        )
+        login.raise_for_status()
+        headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+        samples, errors = [], []
+        deadline = time.perf_counter() + args.duration
+        await asyncio.gather(*(
+            worker(client, args.path, headers, deadline, samples, errors)
+            for _ in range(args.concurrency)
+        ))
+
+    print(f"{args.path} x{args.concurrency} for {args.duration:.0f}s")
+    print(f"  requests/sec : {len(samples) / args.duration:.1f}")
+    print(f"  errors       : {len(errors)}")
+    for pct in (50, 95, 99):
+        print(f"  p{pct:<2}          : {percentile(samples, pct):.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("url")
+    parser.add_argument("--path", default="/martyrs")
+    parser.add_argument("--username", default="admin")
+    parser.add_argument("--password", default="admin123")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=15.0)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Query plan benchmark for the listing indexes
+Shows the hot listing/stats queries moving from table scans to index scans
+
+Each listing is what GET /martyrs runs: the ETag version check, then the
+page of response columns (keyset_order + apply_cursor). It is timed on the
+first page and on a cursor near the end: with the indexes both must be index
+seeks at the same cost.
+
+Usage (from backend/):
+    python benchmarks/bench_indexes.py                      # temporary SQLite file
+    python benchmarks/bench_indexes.py postgresql://...     # scratch PostgreSQL database
+"""
+
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import create_engine, func, select, text
+
+from conditional import version_query
+from database import Base
+from models import User, Martyr, Injured, Prisoner  # noqa: F401
+from pagination import apply_cursor, encode_cursor, keyset_order
+from schemas import MartyrResponse
+from serialization import response_columns
+
+ROWS = 300_000
+PAGE = 100
+OWNER_FILTERS = (Martyr.added_by_user_id == 7, Martyr.status == "pending")
+ADMIN_FILTERS = (Martyr.status == "pending",)
+
+
+def listing(filters, cursor=None):
+    """The statements GET /martyrs runs for these filters and cursor"""
+    page = keyset_order(select(*response_columns(Martyr, MartyrResponse)).where(*filters), Martyr)
+    return [version_query(Martyr), apply_cursor(page, Martyr, cursor).limit(PAGE)]
+
+
+def deep_cursor(conn, filters):
+    """Cursor for the page that starts 95% of the way down the listing"""
+    total = conn.execute(select(func.count()).select_from(Martyr).where(*filters)).scalar()
+    query = keyset_order(select(Martyr.id, Martyr.created_at).where(*filters), Martyr)
+    row = conn.execute(query.offset(int(total * 0.95)).limit(1)).one()
+    return encode_cursor(row.created_at, row.id)
+
+
+def queries(conn):
+    return {
+        "owner listing, first page": listing(OWNER_FILTERS),
+        "owner listing, deep cursor": listing(OWNER_FILTERS, deep_cursor(conn, OWNER_FILTERS)),
+        "admin listing, first page": listing(ADMIN_FILTERS),
+        "admin listing, deep cursor": listing(ADMIN_FILTERS, deep_cursor(conn, ADMIN_FILTERS)),
+        "pending count": [select(func.count()).select_from(Martyr).where(*ADMIN_FILTERS)],
+    }
+
+
+def explain(conn, statements):
+    prefix = "EXPLAIN QUERY PLAN " if conn.dialect.name == "sqlite" else "EXPLAIN "
+    plans = []
+    for query in statements:
+        sql = query.compile(conn, compile_kwargs={"literal_binds": True})
+        rows = conn.execute(text(f"{prefix}{sql}")).fetchall()
+        plans.append("\n".join("    " + str(row[-1]) for row in rows))
+    return "\n    --\n".join(plans)
+
+
+def timed(conn, statements, repeat=20):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for query in statements:
+            conn.execute(query).fetchall()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def seed(conn):
+    conn.execute(text(
+        "INSERT INTO users (id, username, password, full_name, user_type) "
+        "VALUES (7, 'bench', 'x', 'bench', 'regular')"
+    ))
+    base = datetime(2024, 1, 1)
+    rows = [
+        {
+            "full_name": f"name {i}", "tribe": "t", "death_date": base,
+            "death_place": "p", "cause_of_death": "c", "contact_family": "f",
+            "status": ("pending", "approved", "rejected")[i % 3],
+            "added_by_user_id": 7 if i % 50 == 0 else 1,
+            "created_at": base + timedelta(minutes=i),
+        }
+        for i in range(ROWS)
+    ]
+    conn.execute(Martyr.__table__.insert(), rows)
+
+
+def report(conn, label):
+    print(f"\n=== {label} ===")
+    for name, statements in queries(conn).items():
+        print(f"  {name}: {timed(conn, statements):.2f} ms")
+        print(explain(conn, statements))
+
+
+def main():
+    url = sys.argv[1] if len(sys.argv) > 1 else None
+    tmpdir = None
+    if url is None:
+        tmpdir = tempfile.mkdtemp()
+        url = f"sqlite:///{os.path.join(tmpdir, 'bench.db')}"
+
+    engine = create_engine(url)
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    indexes = [index for index in Martyr.__table__.indexes if len(index.columns) > 1]
+
+    with engine.begin() as conn:
+        seed(conn)
+        for index in indexes:
+            index.drop(conn)
+        conn.execute(text("ANALYZE"))
+        report(conn, "without composite indexes")
+
+        for index in indexes:
+            index.create(conn)
+        conn.execute(text("ANALYZE"))
+        report(conn, "with composite indexes")
+
+    Base.metadata.drop_all(engine)
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Listing serialization benchmark
+Rows per second for the old ORM + from_orm + response_model path against the
+column-tuple + orjson fast path, at 100 / 1000 / 10000 rows per page
+
+Usage (from backend/):
+    python benchmarks/bench_serialization.py
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import orjson
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine, select, text
+from sqlalchemy.orm import Session
+
+from database import Base
+from models import Martyr
+from pagination import keyset_order
+from schemas import MartyrResponse
+from serialization import response_columns, rows_to_dicts
+
+PAGE_SIZES = (100, 1000, 10_000)
+REPEAT = 5
+
+
+def seed(conn, count):
+    conn.execute(text(
+        "INSERT INTO users (id, username, password, full_name, user_type) "
+        "VALUES (1, 'bench', 'x', 'bench', 'admin')"
+    ))
+    base = datetime(2024, 1, 1)
+    conn.execute(Martyr.__table__.insert(), [
+        {
+            "full_name": f"الشهيد رقم {i}", "nickname": "أبو محمد", "tribe": "عائلة",
+            "death_date": base, "death_place": "غزة", "cause_of_death": "قصف",
+            "participation_fronts": "نص طويل " * 40, "contact_family": "0599000000",
+            "photo_path": f"uploads/photos/aa/bb/{i:064x}.jpg",
+            "status": "pending", "added_by_user_id": 1,
+            "created_at": base + timedelta(seconds=i),
+        }
+        for i in range(count)
+    ])
+
+
+def orm_path(session, limit):
+    """What the listings did before: ORM rows, from_orm, then response_model again"""
+    martyrs = session.scalars(keyset_order(select(Martyr), Martyr).limit(limit)).all()
+    responses = [MartyrResponse.from_orm(martyr) for martyr in martyrs]
+    adapter = TypeAdapter(List[MartyrResponse])
+    content = adapter.dump_python(adapter.validate_python(responses), mode="json")
+    return json.dumps(content, ensure_ascii=False).encode("utf-8")
+
+
+def fast_path(session, limit):
+    """Column tuples straight to orjson"""
+    query = keyset_order(select(*response_columns(Martyr, MartyrResponse)), Martyr)
+    rows = session.execute(query.limit(limit)).all()
+    return orjson.dumps(rows_to_dicts(rows, Martyr, MartyrResponse))
+
+
+def rows_per_second(engine, path, limit):
+    best = float("inf")
+    for _ in range(REPEAT):
+        with Session(engine) as session:
+            start = time.perf_counter()
+            path(session, limit)
+            best = min(best, time.perf_counter() - start)
+    return limit / best
+
+
+def main():
+    tmpdir = tempfile.mkdtemp()
+    engine = create_engine(f"sqlite:///{os.path.join(tmpdir, 'bench.db')}")
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        seed(conn, max(PAGE_SIZES))
+
+    print(f"{'rows':>7} {'orm + from_orm':>16} {'columns + orjson':>18} {'speedup':>8}")
+    for limit in PAGE_SIZES:
+        slow = rows_per_second(engine, orm_path, limit)
+        fast = rows_per_second(engine, fast_path, limit)
+        print(f"{limit:>7} {slow:>12,.0f} r/s {fast:>14,.0f} r/s {fast / slow:>7.1f}x")
+
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Login load test
+Fires concurrent /auth/login requests while probing /health latency
+
+Usage (server already running, e.g. `uvicorn main:app --port 8000`):
+    python benchmarks/load_login.py http://localhost:8000 --username admin --password admin123
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+
+async def login_worker(client, args, deadline, counter):
+    payload = {"username": args.username, "password": args.password}
+    while time.perf_counter() < deadline:
+        response = await client.post("/auth/login", json=payload)
+        counter[response.status_code] = counter.get(response.status_code, 0) + 1
+
+
+async def health_probe(client, deadline, samples):
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        await client.get("/health")
+        samples.append((time.perf_counter() - start) * 1000)
+        await asyncio.sleep(0.05)
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def run(args):
+    limits = httpx.Limits(max_connections=args.concurrency + 4)
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=60) as client:
+        deadline = time.perf_counter() + args.duration
+        counter, samples = {}, []
+        await asyncio.gather(
+            health_probe(client, deadline, samples),
+            *(login_worker(client, args, deadline, counter) for _ in range(args.concurrency)),
+        )
+        # /metrics is admin-only; the load-test account is expected to be an admin
+        token = (await client.post("/auth/login", json={
+            "username": args.username, "password": args.password,
+        })).json()["access_token"]
+        metrics = (await client.get("/metrics", headers={"Authorization": f"Bearer {token}"})).json()
+
+    logins = counter.get(200, 0)
+    print(f"concurrency        : {args.concurrency}")
+    print(f"logins/sec         : {logins / args.duration:.1f}")
+    print(f"status codes       : {counter}")
+    print(f"/health p50 / p99  : {statistics.median(samples or [0]):.1f} ms / {percentile(samples, 99):.1f} ms")
+    print(f"hashing pool       : {metrics.get('password_hashing')}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("url")
+    parser.add_argument("--username", default="admin")
+    parser.add_argument("--password", default="admin123")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Moderation event broker for Palestine Martyrs API
+Fans create / status-change / delete events out to connected admin sessions
+
+In-process by default; with EVENTS_BROKER_URL=redis://... every worker
+publishes to and listens on one Redis channel, so an admin connected to any
+worker sees events raised by all of them.
+"""
+
+import asyncio
+import json
+import logging
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import AsyncIterator, List, Optional, Set
+
+from config import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+CHANNEL = "moderation-events"
+
+
+class InProcessBroker:
+    """One bounded queue per subscriber; slow subscribers lose their oldest events"""
+
+    def __init__(self, queue_size: int):
+        self.queue_size = queue_size
+        self._subscribers: Set[asyncio.Queue] = set()
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def deliver(self, event: dict) -> None:
+        for queue in self._subscribers:
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(event)
+
+    async def publish(self, event: dict) -> None:
+        self.deliver(event)
+
+    @asynccontextmanager
+    async def subscribe(self) -> AsyncIterator[asyncio.Queue]:
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.add(queue)
+        try:
+            yield queue
+        finally:
+            self._subscribers.discard(queue)
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+
+class RedisBroker(InProcessBroker):
+    """Publishes through Redis pub/sub; one listener per worker feeds local subscribers"""
+
+    def __init__(self, url: str, queue_size: int):
+        super().__init__(queue_size)
+        self.url = url
+        self._redis = None
+        self._listener: Optional[asyncio.Task] = None
+
+    async def publish(self, event: dict) -> None:
+        await self._redis.publish(CHANNEL, json.dumps(event, ensure_ascii=False))
+
+    async def start(self) -> None:
+        import redis.asyncio as redis
+
+        self._redis = redis.from_url(self.url)
+        pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+        await pubsub.subscribe(CHANNEL)
+        self._listener = asyncio.create_task(self._listen(pubsub))
+
+    async def _listen(self, pubsub) -> None:
+        while True:
+            try:
+                async for message in pubsub.listen():
+                    self.deliver(json.loads(message["data"]))
+            except asyncio.CancelledError:
+                await pubsub.close()
+                raise
+            except Exception:
+                # The pubsub reconnects and re-subscribes on its next read
+                logger.exception("Moderation event listener lost Redis; retrying")
+                await asyncio.sleep(1)
+
+    async def stop(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+        if self._redis is not None:
+            await self._redis.close()
+
+
+async def _wait_for_disconnect(websocket) -> None:
+    while (await websocket.receive())["type"] != "websocket.disconnect":
+        pass
+
+
+async def forward_events(websocket, queue: asyncio.Queue) -> None:
+    """Send queued events to a WebSocket until the client goes away"""
+    disconnected = asyncio.ensure_future(_wait_for_disconnect(websocket))
+    try:
+        while True:
+            next_event = asyncio.ensure_future(queue.get())
+            done, _ = await asyncio.wait({next_event, disconnected}, return_when=asyncio.FIRST_COMPLETED)
+            if disconnected in done:
+                next_event.cancel()
+                return
+            await websocket.send_json(next_event.result())
+    except Exception:
+        # Send failed: the client vanished without a close frame
+        return
+    finally:
+        disconnected.cancel()
+
+
+def create_broker() -> InProcessBroker:
+    if settings.events_broker_url:
+        return RedisBroker(settings.events_broker_url, settings.events_queue_size)
+    return InProcessBroker(settings.events_queue_size)
+
+
+broker = create_broker()
+
+
+async def publish_event(event_type: str, record_type: str, ids: List[int], **fields) -> None:
+    """Announce a moderation event; never lets a broker failure fail the request"""
+    event = {
+        "type": event_type,
+        "record_type": record_type,
+        "ids": ids,
+        **fields,
+        "at": datetime.utcnow().isoformat(),
+    }
+    try:
+        await broker.publish(event)
+    except Exception:
+        logger.exception("Could not publish %s event for %s", event_type, record_type)
@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Bulk import for Palestine Martyrs API
+Streams CSV / NDJSON rows, validates them against the Create schemas and
+inserts them in batched transactions with a per-row error report
+
+CLI usage (from backend/):
+    python bulk_import.py martyrs export.csv --username admin --batch-size 2000
+"""
+
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+from collections import Counter
+from typing import BinaryIO, Iterator, List, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import insert, update
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+from arabic import build_search_text
+from config import get_settings
+from database import write_lock
+from duplicates import record_key
+from models import UploadedFile
+from records import RecordType, RECORD_TYPES
+from uploads import storage_path
+
+settings = get_settings()
+
+FORMATS = ("csv", "ndjson")
+RECORD_STATUSES = ("pending", "approved", "rejected")
+MAX_REPORTED_ERRORS = 1000
+
+# (line number in the source file, validated row)
+Row = Tuple[int, dict]
+
+
+class ImportReport:
+    """Counters plus a bounded list of per-row errors"""
+
+    def __init__(self, record_type: str):
+        self.record_type = record_type
+        self.inserted = 0
+        self.failed = 0
+        self.errors: List[dict] = []
+
+    def add_error(self, line: int, messages: List[str]) -> None:
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line, "errors": messages})
+
+    def as_dict(self) -> dict:
+        return {
+            "record_type": self.record_type,
+            "inserted": self.inserted,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+        }
+
+
+def detect_format(filename: Optional[str], content_type: Optional[str], explicit: Optional[str] = None) -> str:
+    """Pick csv/ndjson from an explicit value, the file extension or the content type"""
+    if explicit:
+        fmt = explicit.lower()
+    else:
+        extension = os.path.splitext(filename or "")[1].lower()
+        if extension == ".csv" or content_type in ("text/csv", "application/csv"):
+            fmt = "csv"
+        elif extension in (".ndjson", ".jsonl") or content_type in ("application/x-ndjson", "application/jsonl"):
+            fmt = "ndjson"
+        else:
+            fmt = ""
+    if fmt not in FORMATS:
+        raise ValueError("Import format must be csv or ndjson")
+    return fmt
+
+
+def iter_raw_rows(binary_file: BinaryIO, fmt: str) -> Iterator[Tuple[int, Optional[dict], Optional[str]]]:
+    """Yield (line, row, parse_error) one record at a time"""
+    text = io.TextIOWrapper(binary_file, encoding="utf-8-sig", newline="")
+    try:
+        if fmt == "csv":
+            reader = csv.DictReader(text)
+            for row in reader:
+                yield reader.line_num, row, None
+        else:
+            for line_no, line in enumerate(text, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError as e:
+                    yield line_no, None, f"invalid JSON: {e}"
+                    continue
+                if not isinstance(row, dict):
+                    yield line_no, None, "expected a JSON object"
+                    continue
+                yield line_no, row, None
+    except UnicodeDecodeError:
+        yield 0, None, "file is not valid UTF-8"
+    finally:
+        # Leave the caller's file open
+        text.detach()
+
+
+def validate_row(record_type: RecordType, raw: dict) -> Tuple[Optional[dict], Optional[List[str]]]:
+    """Run a raw row through the record's Create schema"""
+    # Empty CSV cells mean "not provided"; the None key holds surplus CSV cells
+    cleaned = {key: (None if value == "" else value) for key, value in raw.items() if key}
+    try:
+        return record_type.create_schema(**cleaned).dict(), None
+    except ValidationError as e:
+        return None, [
+            f"{'.'.join(str(part) for part in error['loc']) or 'row'}: {error['msg']}"
+            for error in e.errors()
+        ]
+
+
+def iter_batches(binary_file: BinaryIO, fmt: str, record_type: RecordType,
+                 batch_size: int, report: ImportReport) -> Iterator[List[Row]]:
+    """Validated rows in lists of at most batch_size; invalid rows go to the report"""
+    batch: List[Row] = []
+    for line, raw, parse_error in iter_raw_rows(binary_file, fmt):
+        if parse_error:
+            report.add_error(line, [parse_error])
+            continue
+        row, errors = validate_row(record_type, raw)
+        if errors:
+            report.add_error(line, errors)
+            continue
+        batch.append((line, row))
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _prepare(batch: List[Row], table_name: str, user_id: int, status: str) -> List[dict]:
+    # Core inserts skip the ORM's before_insert hooks, so derive those columns here;
+    # created_at is left to the column default, evaluated when the INSERT runs
+    return [
+        dict(row, added_by_user_id=user_id, status=status,
+             search_text=build_search_text(row["full_name"], row.get("nickname"), row.get("tribe")),
+             dedupe_key=record_key(table_name, row))
+        for _, row in batch
+    ]
+
+
+def _reference_updates(rows: List[dict]):
+    """UPDATEs bumping uploaded_files.ref_count for the files a batch points at"""
+    counts = Counter(
+        storage_path(path) for row in rows
+        for path in (row.get("photo_path"), row.get("cv_file_path")) if path
+    )
+    by_increment = {}
+    for path, count in counts.items():
+        by_increment.setdefault(count, []).append(path)
+    return [
+        update(UploadedFile)
+        .where(UploadedFile.path.in_(paths))
+        .values(ref_count=UploadedFile.ref_count + increment)
+        for increment, paths in by_increment.items()
+    ]
+
+
+def _db_error(e: DBAPIError) -> List[str]:
+    return [f"database: {str(e.orig).strip().splitlines()[0]}"]
+
+
+async def import_records(db: AsyncSession, record_type: RecordType, binary_file: BinaryIO,
+                         fmt: str, user_id: int, status: str = "pending",
+                         batch_size: Optional[int] = None) -> ImportReport:
+    """Import a file through the API's async session, one transaction per batch"""
+    report = ImportReport(record_type.name)
+    batches = iter_batches(binary_file, fmt, record_type, batch_size or settings.import_batch_size, report)
+    table = record_type.model.__table__
+
+    while True:
+        # Parsing and validation are CPU-bound; keep them off the event loop
+        batch = await run_in_threadpool(next, batches, None)
+        if batch is None:
+            break
+        rows = _prepare(batch, table.name, user_id, status)
+        try:
+            async with write_lock():
+                await db.execute(insert(table), rows)
+                for statement in _reference_updates(rows):
+                    await db.execute(statement)
+                await db.commit()
+            report.inserted += len(rows)
+        except DBAPIError:
+            await db.rollback()
+            # Find the offending rows one by one so the rest of the batch still lands
+            for (line, _), row in zip(batch, rows):
+                try:
+                    async with write_lock():
+                        await db.execute(insert(table), [row])
+                        for statement in _reference_updates([row]):
+                            await db.execute(statement)
+                        await db.commit()
+                    report.inserted += 1
+                except DBAPIError as e:
+                    await db.rollback()
+                    report.add_error(line, _db_error(e))
+    return report
+
+
+def import_file(engine, record_type: RecordType, path: str, fmt: str, user_id: int,
+                status: str = "pending", batch_size: Optional[int] = None) -> ImportReport:
+    """Synchronous import for the CLI, using executemany per batch"""
+    report = ImportReport(record_type.name)
+    table = record_type.model.__table__
+    with open(path, "rb") as binary_file:
+        for batch in iter_batches(binary_file, fmt, record_type, batch_size or settings.import_batch_size, report):
+            rows = _prepare(batch, table.name, user_id, status)
+            try:
+                with engine.begin() as conn:
+                    conn.execute(insert(table), rows)
+                    for statement in _reference_updates(rows):
+                        conn.execute(statement)
+                report.inserted += len(rows)
+            except DBAPIError:
+                for (line, _), row in zip(batch, rows):
+                    try:
+                        with engine.begin() as conn:
+                            conn.execute(insert(table), [row])
+                            for statement in _reference_updates([row]):
+                                conn.execute(statement)
+                        report.inserted += 1
+                    except DBAPIError as e:
+                        report.add_error(line, _db_error(e))
+            print(f"  {report.inserted} inserted, {report.failed} failed", file=sys.stderr)
+    return report
+
+
+def main():
+    from sqlalchemy import select
+    from database import engine
+    from models import User
+
+    parser = argparse.ArgumentParser(description="Bulk import martyrs, injured or prisoners")
+    parser.add_argument("record_type", choices=sorted(RECORD_TYPES))
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=FORMATS, help="defaults to the file extension")
+    parser.add_argument("--username", default="admin", help="user recorded as added_by")
+    parser.add_argument("--status", choices=RECORD_STATUSES, default="pending")
+    parser.add_argument("--batch-size", type=int, default=settings.import_batch_size)
+    args = parser.parse_args()
+
+    fmt = detect_format(args.path, None, args.format)
+    with engine.connect() as conn:
+        user_id = conn.execute(select(User.id).where(User.username == args.username)).scalar()
+    if user_id is None:
+        parser.error(f"user '{args.username}' not found")
+
+    report = import_file(
+        engine, RECORD_TYPES[args.record_type], args.path, fmt, user_id,
+        status=args.status, batch_size=args.batch_size,
+    )
+    json.dump(report.as_dict(), sys.stdout, ensure_ascii=False, indent=2, default=str)
+    print()
+    sys.exit(1 if report.failed else 0)
+
+
+if __name__ == "__main__":
+    main()
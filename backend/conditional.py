@@ -0,0 +1,77 @@
+"""
+Conditional GET for Palestine Martyrs API
+Cheap collection versions turned into ETags, so unchanged polls get a 304
+without loading or serializing a single record
+"""
+
+import hashlib
+from datetime import datetime
+from typing import Optional
+
+from fastapi import Request, Response
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import DeletedRecord, changed_at
+from sync import SYNC_SETTLE
+
+# Clients may cache, but must revalidate with If-None-Match every time
+REVALIDATE_PRIVATE = "private, no-cache"
+
+
+def etag_matches(header: Optional[str], etag: str) -> bool:
+    """If-None-Match comparison (weak, so W/ prefixes on either side match)"""
+    if not header:
+        return False
+    bare = etag[2:] if etag.startswith("W/") else etag
+    candidates = [value.strip() for value in header.split(",")]
+    return "*" in candidates or bare in candidates or f"W/{bare}" in candidates
+
+
+def make_etag(*parts) -> str:
+    digest = hashlib.blake2b("|".join(str(part) for part in parts).encode("utf-8"), digest_size=12)
+    return f'W/"{digest.hexdigest()}"'
+
+
+def version_query(model):
+    """(newest change, newest deletion) of a record table: two index lookups
+
+    Listing filters are not applied: a filtered count or max reads every
+    matching row. The query string and caller scope are part of the ETag, so
+    any write to the table just revalidates every listing of it once.
+    """
+    newest_change = select(func.max(changed_at(model))).scalar_subquery()
+    newest_deletion = select(func.max(DeletedRecord.deleted_at)).scalar_subquery()
+    return select(newest_change, newest_deletion)
+
+
+async def collection_version(db: AsyncSession, model) -> tuple:
+    return tuple((await db.execute(version_query(model))).one())
+
+
+def is_settled(version: tuple) -> bool:
+    """True once every write stamped up to the version's times must have committed"""
+    horizon = datetime.utcnow() - SYNC_SETTLE
+    return all(at is None or at <= horizon for at in version)
+
+
+def not_modified(request: Request, response: Response, etag: str) -> Optional[Response]:
+    """A 304 if the client already holds etag; otherwise tag the real response"""
+    headers = {"ETag": etag, "Cache-Control": REVALIDATE_PRIVATE}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
+
+
+async def check_collection(request: Request, response: Response, db: AsyncSession,
+                           model, scope) -> Optional[Response]:
+    """Version a listing; the query string and caller scope are part of the tag"""
+    version = await collection_version(db, model)
+    if not is_settled(version):
+        # A write stamped earlier may still be committing without moving the
+        # maximum; no validator until it must have landed
+        response.headers["Cache-Control"] = REVALIDATE_PRIVATE
+        return None
+    etag = make_etag(model.__tablename__, scope, request.url.query, *version)
+    return not_modified(request, response, etag)
@@ -3,9 +3,10 @@ Configuration settings for Palestine Martyrs API
 Environment variables and app settings
 """
 
-from pydantic import BaseSettings, Field
-from typing import Optional
-import os
+from pydantic import Field
+from pydantic_settings import BaseSettings
+from typing import Callable, List, Optional
+import threading
 
 class Settings(BaseSettings):
     # App Settings
@@ -14,16 +15,37 @@ class Settings(BaseSettings):
     debug: bool = Field(default=True, env="DEBUG")
     
     # Security
-    jwt_secret: str = Field(default="your-super-secret-jwt-key-change-in-production-2024", env="JWT_SECRET_KEY")
+    jwt_secret: str = Field(default="your-super-secret-jwt-key-change-in-production-2024", validation_alias="JWT_SECRET_KEY")
     jwt_algorithm: str = "HS256"
     access_token_expire_hours: int = 24
     
     # Database
     database_url: str = Field(default="sqlite:///./palestine_martyrs.db", env="DATABASE_URL")
     
+    # SQLite Mode
+    sqlite_wal: bool = Field(default=True, env="SQLITE_WAL")
+    sqlite_synchronous: str = Field(default="NORMAL", env="SQLITE_SYNCHRONOUS")
+    sqlite_busy_timeout: int = Field(default=5000, env="SQLITE_BUSY_TIMEOUT")  # milliseconds
+    sqlite_mmap_size: int = Field(default=256 * 1024 * 1024, env="SQLITE_MMAP_SIZE")  # bytes
+    
+    # Connection Pool (PostgreSQL)
+    db_pool_size: int = Field(default=5, env="DB_POOL_SIZE")
+    db_max_overflow: int = Field(default=10, env="DB_MAX_OVERFLOW")
+    db_pool_timeout: int = Field(default=30, env="DB_POOL_TIMEOUT")  # seconds to wait for a free connection
+    db_pool_recycle: int = Field(default=1800, env="DB_POOL_RECYCLE")  # seconds before a connection is replaced
+    db_pool_pre_ping: bool = Field(default=True, env="DB_POOL_PRE_PING")
+    db_statement_timeout: int = Field(default=30000, env="DB_STATEMENT_TIMEOUT")  # milliseconds, 0 = unlimited
+    
     # File Upload Settings
-    max_file_size: int = 10 * 1024 * 1024  # 10MB
-    upload_path: str = "./uploads"
+    max_file_size: int = Field(default=10 * 1024 * 1024, env="MAX_FILE_SIZE")  # 10MB
+    upload_path: str = Field(default="./uploads", env="UPLOAD_PATH")
+    upload_chunk_size: int = Field(default=64 * 1024, env="UPLOAD_CHUNK_SIZE")  # 64KB
+    upload_accel_redirect_prefix: str = Field(default="", env="UPLOAD_ACCEL_REDIRECT_PREFIX")  # e.g. /protected-uploads behind nginx
+    upload_orphan_ttl: int = Field(default=24 * 3600, env="UPLOAD_ORPHAN_TTL")  # seconds an unreferenced upload is kept
+    upload_purge_interval: int = Field(default=3600, env="UPLOAD_PURGE_INTERVAL")  # seconds between purges, 0 = never
+    thumbnail_sizes: list = Field(default=[80, 320, 1280], env="THUMBNAIL_SIZES")  # px, longest side
+    thumbnail_quality: int = Field(default=80, env="THUMBNAIL_QUALITY")  # WebP quality
+    image_workers: int = Field(default=2, env="IMAGE_WORKERS")  # 0 = one process per CPU core
     allowed_image_types: list = ["image/jpeg", "image/png", "image/gif"]
     allowed_document_types: list = [
         "application/pdf",
@@ -41,6 +63,30 @@ class Settings(BaseSettings):
     # Admin Settings
     admin_email: str = Field(default="admin@palestinemartyrs.org", env="ADMIN_EMAIL")
     
+    # Password Hashing Pool
+    password_hash_workers: int = Field(default=0, env="PASSWORD_HASH_WORKERS")  # 0 = one per CPU core
+    password_hash_max_queue: int = Field(default=64, env="PASSWORD_HASH_MAX_QUEUE")
+    
+    # Bulk Import
+    import_batch_size: int = Field(default=1000, env="IMPORT_BATCH_SIZE")  # rows per transaction
+    
+    # Bulk Export
+    export_batch_size: int = Field(default=1000, env="EXPORT_BATCH_SIZE")  # rows fetched per cursor round trip
+    
+    # Cache Settings
+    stats_cache_ttl: int = Field(default=30, env="STATS_CACHE_TTL")  # seconds
+    auth_cache_ttl: int = Field(default=60, env="AUTH_CACHE_TTL")  # seconds
+    auth_cache_size: int = Field(default=4096, env="AUTH_CACHE_SIZE")  # entries
+    
+    # Response Compression
+    compression_minimum_size: int = Field(default=500, env="COMPRESSION_MINIMUM_SIZE")  # bytes; smaller bodies are sent as-is
+    compression_gzip_level: int = Field(default=6, env="COMPRESSION_GZIP_LEVEL")
+    compression_brotli_quality: int = Field(default=4, env="COMPRESSION_BROTLI_QUALITY")  # 0-11; admin assets always use 11
+    
+    # Moderation Events
+    events_broker_url: str = Field(default="", env="EVENTS_BROKER_URL")  # empty = in-process, redis://... for multi-worker
+    events_queue_size: int = Field(default=256, env="EVENTS_QUEUE_SIZE")  # events buffered per connected admin
+    
     # API Settings
     api_v1_prefix: str = "/api/v1"
     docs_url: str = "/docs"
@@ -62,14 +108,47 @@ class Settings(BaseSettings):
     def is_development(self) -> bool:
         return self.environment.lower() == "development"
     
+    @property
+    def sqlalchemy_database_url(self) -> str:
+        """The URL the engines connect to; development always uses the local SQLite file"""
+        if self.environment == "development":
+            return "sqlite:///./palestine_martyrs.db"
+        return self.database_url
+    
     class Config:
         env_file = ".env"
         case_sensitive = False
+        extra = "ignore"  # .env also carries launcher-only keys (WEB_CONCURRENCY, ...)
+
+_settings: Optional[Settings] = None
+_settings_lock = threading.Lock()
+_reload_hooks: List[Callable[[Settings], None]] = []
 
 def get_settings() -> Settings:
-    return Settings()
+    """The process-wide Settings, parsed from the environment / .env once"""
+    global _settings
+    if _settings is None:
+        with _settings_lock:
+            if _settings is None:
+                _settings = Settings()
+    return _settings
+
+def on_settings_reload(hook: Callable[[Settings], None]) -> Callable[[Settings], None]:
+    """Register a callback run after reload_settings(), e.g. to resize caches"""
+    _reload_hooks.append(hook)
+    return hook
+
+def reload_settings() -> Settings:
+    """Re-read the environment / .env into the existing Settings object
 
-# Create uploads directory
-settings = get_settings()
-os.makedirs(f"{settings.upload_path}/photos", exist_ok=True)
-os.makedirs(f"{settings.upload_path}/documents", exist_ok=True)
\ No newline at end of file
+    Updated in place, so modules holding `settings = get_settings()` see the
+    new values. Values consumed at startup (engine pool, worker pools) only
+    change on restart.
+    """
+    fresh = Settings()
+    current = get_settings()
+    with _settings_lock:
+        current.__dict__.update(fresh.__dict__)
+    for hook in _reload_hooks:
+        hook(current)
+    return current
\ No newline at end of file
@@ -3,36 +3,163 @@ Database configuration for Palestine Martyrs API
 SQLAlchemy database setup and connection
 """
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
+from contextlib import asynccontextmanager
+import asyncio
 import os
 from config import get_settings
+from pool_metrics import InstrumentedQueuePool, InstrumentedAsyncQueuePool
 
 settings = get_settings()
 
+def pool_options() -> dict:
+    """Pool tuning shared by the sync and async server engines"""
+    return {
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+    }
+
+def is_sqlite(url: str) -> bool:
+    return make_url(url).get_backend_name() == "sqlite"
+
+SQLITE_SYNCHRONOUS_MODES = {"OFF", "NORMAL", "FULL", "EXTRA"}
+
+def apply_sqlite_pragmas(dbapi_connection, connection_record):
+    """Per-connection SQLite tuning: WAL so readers never block the writer"""
+    synchronous = settings.sqlite_synchronous.upper()
+    if synchronous not in SQLITE_SYNCHRONOUS_MODES:
+        raise ValueError(f"Invalid SQLITE_SYNCHRONOUS value: {settings.sqlite_synchronous}")
+    
+    cursor = dbapi_connection.cursor()
+    try:
+        if settings.sqlite_wal:
+            cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute(f"PRAGMA synchronous={synchronous}")
+        cursor.execute(f"PRAGMA busy_timeout={int(settings.sqlite_busy_timeout)}")
+        cursor.execute(f"PRAGMA mmap_size={int(settings.sqlite_mmap_size)}")
+    finally:
+        cursor.close()
+
 # Database URL
 # For development: SQLite
-# For production: PostgreSQL
-if settings.environment == "development":
-    SQLALCHEMY_DATABASE_URL = "sqlite:///./palestine_martyrs.db"
+# For production: PostgreSQL (or SQLite for small deployments)
+SQLALCHEMY_DATABASE_URL = settings.sqlalchemy_database_url
+
+if is_sqlite(SQLALCHEMY_DATABASE_URL):
     engine = create_engine(
         SQLALCHEMY_DATABASE_URL, 
         connect_args={"check_same_thread": False}
     )
 else:
-    # Production PostgreSQL
-    SQLALCHEMY_DATABASE_URL = settings.database_url
-    engine = create_engine(SQLALCHEMY_DATABASE_URL)
+    connect_args = {}
+    if settings.db_statement_timeout:
+        connect_args["options"] = f"-c statement_timeout={settings.db_statement_timeout}"
+    engine = create_engine(
+        SQLALCHEMY_DATABASE_URL,
+        poolclass=InstrumentedQueuePool,
+        connect_args=connect_args,
+        **pool_options()
+    )
+
+if is_sqlite(SQLALCHEMY_DATABASE_URL):
+    event.listen(engine, "connect", apply_sqlite_pragmas)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine used by the API endpoints so DB round trips never block the event loop
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+}
+
+def to_async_url(url: str) -> str:
+    """Map a sync database URL to its async driver equivalent"""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for database backend '{backend}'")
+    return parsed.set(drivername=ASYNC_DRIVERS[backend]).render_as_string(hide_password=False)
+
+ASYNC_DATABASE_URL = to_async_url(SQLALCHEMY_DATABASE_URL)
+if is_sqlite(ASYNC_DATABASE_URL):
+    async_engine = create_async_engine(ASYNC_DATABASE_URL)
+    event.listen(async_engine.sync_engine, "connect", apply_sqlite_pragmas)
+else:
+    async_connect_args = {}
+    if settings.db_statement_timeout:
+        async_connect_args["server_settings"] = {"statement_timeout": str(settings.db_statement_timeout)}
+    async_engine = create_async_engine(
+        ASYNC_DATABASE_URL,
+        poolclass=InstrumentedAsyncQueuePool,
+        connect_args=async_connect_args,
+        **pool_options()
+    )
+
+# SQLite allows one writer at a time; queueing writers here (FIFO) instead of
+# letting them race for the file lock avoids "database is locked" errors.
+# Reads never take this lock, and WAL keeps them concurrent with the writer.
+_sqlite_writer = asyncio.Lock() if is_sqlite(ASYNC_DATABASE_URL) else None
+_sqlite_writer_task = None
+
+@asynccontextmanager
+async def write_lock():
+    """Serialize a write transaction on SQLite (no-op on PostgreSQL)
+    
+    Re-entrant within a task, so a commit() inside a locked block does not
+    wait on itself.
+    """
+    global _sqlite_writer_task
+    if _sqlite_writer is None or _sqlite_writer_task is asyncio.current_task():
+        yield
+        return
+    async with _sqlite_writer:
+        _sqlite_writer_task = asyncio.current_task()
+        try:
+            yield
+        finally:
+            _sqlite_writer_task = None
+
+class SerializedWriteSession(AsyncSession):
+    """AsyncSession whose commits go through the SQLite writer queue
+    
+    With autoflush off, pending INSERT/UPDATEs are flushed inside commit(),
+    so the whole write transaction runs under the lock. Code that issues DML
+    with execute() directly should wrap it in `async with write_lock()`.
+    """
+    
+    async def commit(self):
+        async with write_lock():
+            await super().commit()
+
+# expire_on_commit=False: responses are built from objects after commit,
+# and async sessions cannot lazy-load expired attributes
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, class_=SerializedWriteSession, autoflush=False, expire_on_commit=False
+)
+
 Base = declarative_base()
 
+# Set once tables and the default admin exist; forked workers inherit it
+_initialized = False
+
 def init_db():
-    """Initialize database tables"""
-    from models import User, Martyr, Injured, Prisoner
+    """Initialize database tables (once per process tree)"""
+    global _initialized
+    if _initialized:
+        return
+    from models import User, Martyr, Injured, Prisoner, UploadedFile, DeletedRecord
+    from search import ensure_search_index
     Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        ensure_search_index(conn)
     
     # Create default admin user if not exists
     from sqlalchemy.orm import Session
@@ -56,6 +183,7 @@ def init_db():
             print("✅ Default admin user created: username=admin, password=admin123")
     finally:
         db.close()
+    _initialized = True
 
 def get_db():
     """Database dependency for FastAPI"""
@@ -63,4 +191,9 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+async def get_async_db():
+    """Async database dependency for FastAPI"""
+    async with AsyncSessionLocal() as db:
+        yield db
\ No newline at end of file
@@ -0,0 +1,74 @@
+"""
+Duplicate detection for Palestine Martyrs API
+Blocking key over normalized name + tribe + event date, so candidate
+duplicates are found with one indexed equality lookup instead of a scan
+"""
+
+import hashlib
+from datetime import date, datetime
+from typing import List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from arabic import normalize_arabic
+
+# The date that identifies the event each record type documents
+EVENT_DATE_COLUMNS = {
+    "martyrs": "death_date",
+    "injured": "injury_date",
+    "prisoners": "capture_date",
+}
+
+MAX_CANDIDATES = 20
+
+
+def _day(value) -> str:
+    if isinstance(value, (datetime, date)):
+        return value.strftime("%Y-%m-%d")
+    return str(value or "")[:10]
+
+
+def blocking_key(full_name: str, tribe: Optional[str], event_date) -> str:
+    """Fixed-width digest of the normalized (name, tribe, day) triple"""
+    raw = "|".join((normalize_arabic(full_name), normalize_arabic(tribe or ""), _day(event_date)))
+    return hashlib.blake2b(raw.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def record_key(table_name: str, values) -> str:
+    """Blocking key for a record given as a mapping of column values"""
+    return blocking_key(
+        values["full_name"], values.get("tribe"), values.get(EVENT_DATE_COLUMNS[table_name])
+    )
+
+
+async def find_duplicates(db: AsyncSession, model, record) -> List[int]:
+    """Ids of other non-rejected records sharing the record's blocking key"""
+    if not record.dedupe_key:
+        return []
+    result = await db.scalars(
+        select(model.id)
+        .where(model.dedupe_key == record.dedupe_key, model.id != record.id, model.status != "rejected")
+        .order_by(model.id)
+        .limit(MAX_CANDIDATES)
+    )
+    return list(result)
+
+
+def backfill_dedupe_keys(conn, tables, batch_size: int = 1000) -> None:
+    """Fill dedupe_key for rows written before the column existed"""
+    for table in tables:
+        date_column = table.c[EVENT_DATE_COLUMNS[table.name]]
+        while True:
+            rows = conn.execute(
+                select(table.c.id, table.c.full_name, table.c.tribe, date_column)
+                .where(table.c.dedupe_key.is_(None))
+                .limit(batch_size)
+            ).all()
+            if not rows:
+                break
+            for row in rows:
+                conn.execute(
+                    table.update().where(table.c.id == row[0])
+                    .values(dedupe_key=blocking_key(row[1], row[2], row[3]))
+                )
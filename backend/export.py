@@ -0,0 +1,165 @@
+"""
+Bulk export for Palestine Martyrs API
+Streams approved records as NDJSON, CSV or Parquet straight from a
+server-side cursor, so memory stays flat regardless of table size
+"""
+
+import csv
+import io
+import json
+from datetime import datetime
+from typing import AsyncIterator, List
+
+from sqlalchemy import select, DateTime, Integer
+
+from config import get_settings
+from database import async_engine
+from records import RecordType
+
+settings = get_settings()
+
+# The only columns an export carries. Family contacts, the submitting user,
+# moderation notes and internal columns (search_text, dedupe_key) never leave
+# the system; a column added to a model stays out until it is listed here.
+EXPORT_COLUMNS = {
+    "martyrs": (
+        "id", "full_name", "nickname", "tribe", "birth_date", "death_date",
+        "death_place", "cause_of_death", "rank_or_position", "participation_fronts",
+        "family_status", "num_children", "photo_path", "created_at", "updated_at",
+    ),
+    "injured": (
+        "id", "full_name", "tribe", "injury_date", "injury_place", "injury_type",
+        "injury_description", "injury_degree", "current_status", "hospital_name",
+        "photo_path", "created_at", "updated_at",
+    ),
+    "prisoners": (
+        "id", "full_name", "tribe", "capture_date", "capture_place", "captured_by",
+        "current_status", "release_date", "detention_place", "notes",
+        "photo_path", "created_at", "updated_at",
+    ),
+}
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",  # the response adds "; charset=utf-8" to text/* types
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+def export_columns(record_type: RecordType) -> list:
+    columns = record_type.model.__table__.columns
+    return [columns[name] for name in EXPORT_COLUMNS[record_type.name]]
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+async def _partitions(record_type: RecordType) -> AsyncIterator[List]:
+    """Approved rows in partitions of export_batch_size, via a streaming cursor"""
+    model = record_type.model
+    columns = export_columns(record_type)
+    statement = (
+        select(*columns)
+        .where(model.status == "approved")
+        .order_by(model.id)
+        .execution_options(yield_per=settings.export_batch_size)
+    )
+    # Own connection: the response body is produced after the handler returns
+    async with async_engine.connect() as conn:
+        result = await conn.stream(statement)
+        async for rows in result.partitions(settings.export_batch_size):
+            yield rows
+
+
+async def stream_ndjson(record_type: RecordType) -> AsyncIterator[bytes]:
+    async for rows in _partitions(record_type):
+        yield "".join(
+            json.dumps(dict(row._mapping), ensure_ascii=False, default=_json_default) + "\n"
+            for row in rows
+        ).encode("utf-8")
+
+
+async def stream_csv(record_type: RecordType) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    # BOM so spreadsheet tools open the Arabic text as UTF-8
+    writer.writerow([column.name for column in export_columns(record_type)])
+    yield ("\ufeff" + buffer.getvalue()).encode("utf-8")
+
+    async for rows in _partitions(record_type):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(
+            [value.isoformat() if isinstance(value, datetime) else value for value in row]
+            for row in rows
+        )
+        yield buffer.getvalue().encode("utf-8")
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that hands written bytes back to the generator"""
+
+    def __init__(self):
+        self.chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def _arrow_schema(pa, columns):
+    fields = []
+    for column in columns:
+        if isinstance(column.type, Integer):
+            arrow_type = pa.int64()
+        elif isinstance(column.type, DateTime):
+            arrow_type = pa.timestamp("us")
+        else:
+            arrow_type = pa.string()
+        fields.append(pa.field(column.name, arrow_type, nullable=column.nullable))
+    return pa.schema(fields)
+
+
+def parquet_available() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+async def stream_parquet(record_type: RecordType) -> AsyncIterator[bytes]:
+    """One Parquet row group per cursor partition"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    columns = export_columns(record_type)
+    schema = _arrow_schema(pa, columns)
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema, compression="zstd")
+    try:
+        async for rows in _partitions(record_type):
+            batch = pa.RecordBatch.from_pylist([dict(row._mapping) for row in rows], schema=schema)
+            writer.write_batch(batch)
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+STREAMERS = {
+    "ndjson": stream_ndjson,
+    "csv": stream_csv,
+    "parquet": stream_parquet,
+}
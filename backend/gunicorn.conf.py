@@ -0,0 +1,121 @@
+"""
+Gunicorn configuration for Palestine Martyrs API
+N uvicorn workers over one preloaded app, for production (PostgreSQL), or a
+single worker on SQLite
+
+Usage (from backend/):
+    gunicorn -c gunicorn.conf.py main:app
+
+Signals to the master process:
+    HUP   re-read settings / .env and gracefully replace every worker
+    TERM  graceful shutdown (workers finish in-flight requests)
+
+With preload_app the application code is imported once in the master, so a
+HUP picks up new settings but not new code: deploy code with a restart.
+
+Workers share nothing in memory. The SQLite writer queue, the dashboard stats
+cache and the auth caches are per worker: with several workers, SQLite writers
+race for the file lock again, and a write only clears the caches of the worker
+that handled it (others serve stale stats for up to STATS_CACHE_TTL). That is
+why SQLite defaults to one worker; set WEB_CONCURRENCY to override.
+"""
+
+import os
+
+from sqlalchemy.engine import make_url
+
+
+def _cpu_count() -> int:
+    try:
+        # Respects container CPU pinning, unlike os.cpu_count()
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def _uses_sqlite() -> bool:
+    from config import Settings
+
+    # A throwaway instance: the app's settings must be read after the pool sizing below
+    return make_url(Settings().sqlalchemy_database_url).get_backend_name() == "sqlite"
+
+
+cores = _cpu_count()
+sqlite = _uses_sqlite()
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+workers = int(os.environ.get("WEB_CONCURRENCY", 0)) or (1 if sqlite else cores)
+worker_class = "uvicorn.workers.UvicornWorker"
+
+# Import the app once in the master; workers fork with it already loaded
+preload_app = True
+
+# Recycle workers periodically (jittered so they never restart together)
+max_requests = int(os.environ.get("MAX_REQUESTS", 10000))
+max_requests_jitter = int(os.environ.get("MAX_REQUESTS_JITTER", 1000))
+
+timeout = int(os.environ.get("WORKER_TIMEOUT", 120))
+graceful_timeout = int(os.environ.get("GRACEFUL_TIMEOUT", 30))
+keepalive = 5
+
+accesslog = "-"
+errorlog = "-"
+
+
+def _size_worker_pools():
+    """Split the database connection budget and the bcrypt threads across workers
+
+    Runs before the app is preloaded, so Settings reads these values. Anything
+    set explicitly in the environment wins.
+    """
+    budget = int(os.environ.get("DB_MAX_CONNECTIONS", 100))
+    per_worker = max(2, budget // workers)
+    pool_size = max(1, per_worker // 2)
+    os.environ.setdefault("DB_POOL_SIZE", str(pool_size))
+    os.environ.setdefault("DB_MAX_OVERFLOW", str(per_worker - pool_size))
+    os.environ.setdefault("PASSWORD_HASH_WORKERS", str(max(1, cores // workers)))
+
+
+_size_worker_pools()
+
+
+def when_ready(server):
+    from config import get_settings
+    from database import init_db
+
+    # Create tables and the default admin before forking, so workers do not race
+    init_db()
+
+    settings = get_settings()
+    server.log.info(
+        "Serving with %d workers (%d cores), DB pool %d+%d per worker",
+        workers, cores, settings.db_pool_size, settings.db_max_overflow,
+    )
+    if workers > 1 and sqlite:
+        server.log.warning(
+            "SQLite with %d workers: each worker queues its own writers, so they race "
+            "for the database lock, and stats/auth caches are only cleared in the "
+            "worker that handled a write; use WEB_CONCURRENCY=1 or PostgreSQL",
+            workers,
+        )
+    if workers > 1 and not settings.events_broker_url:
+        server.log.warning(
+            "EVENTS_BROKER_URL is not set: moderation events only reach admins "
+            "connected to the worker that raised them"
+        )
+
+
+def on_reload(server):
+    # New workers are forked from the master, so refresh its settings first
+    from config import reload_settings
+
+    reload_settings()
+    server.log.info("Settings reloaded; replacing workers")
+
+
+def post_fork(server, worker):
+    # Never share pooled connections inherited from the master across processes
+    from database import engine, async_engine
+
+    engine.dispose(close=False)
+    async_engine.sync_engine.dispose(close=False)
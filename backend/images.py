@@ -0,0 +1,94 @@
+"""
+Image processing pipeline for Palestine Martyrs API
+WebP thumbnails for uploaded photos, generated in a process pool
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional
+
+from PIL import Image, ImageOps
+
+from config import get_settings
+from uploads import upload_url
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Only content-addressed photos (uploads.content_path) get variants
+_CONTENT_ADDRESSED = re.compile(r"[0-9a-f]{64}\.[a-z0-9]+$")
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+
+def thumbnail_path(photo_path: str, size: int) -> str:
+    """Where the `size` px WebP variant of a photo lives"""
+    return f"{os.path.splitext(photo_path)[0]}_{size}.webp"
+
+
+def thumbnail_paths(photo_path: Optional[str]) -> Optional[Dict[str, str]]:
+    """/uploads/ URLs of all variants of a photo, keyed by size, or None if it has none"""
+    if not photo_path or not _CONTENT_ADDRESSED.search(photo_path):
+        return None
+    url = upload_url(photo_path)
+    return {str(size): thumbnail_path(url, size) for size in settings.thumbnail_sizes}
+
+
+def generate_thumbnails(photo_path: str) -> Dict[str, str]:
+    """Write WebP variants of a photo (runs in a worker process)
+
+    EXIF orientation is applied to the pixels and the metadata is not
+    copied, so variants carry no EXIF (GPS, device) data.
+    """
+    written = {}
+    with Image.open(photo_path) as original:
+        image = ImageOps.exif_transpose(original)
+        if image.mode not in ("RGB", "RGBA"):
+            has_alpha = image.mode in ("LA", "PA") or "transparency" in image.info
+            image = image.convert("RGBA" if has_alpha else "RGB")
+
+        for size in sorted(settings.thumbnail_sizes):
+            target = thumbnail_path(photo_path, size)
+            if os.path.exists(target):
+                written[str(size)] = target
+                continue
+            variant = image.copy()
+            variant.thumbnail((size, size), Image.LANCZOS)
+            temp_path = f"{target}.part"
+            variant.save(temp_path, "WEBP", quality=settings.thumbnail_quality, method=4)
+            os.replace(temp_path, target)
+            written[str(size)] = target
+    return written
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        # spawn: never fork a process that is running threads and an event loop
+        _executor = ProcessPoolExecutor(
+            max_workers=settings.image_workers or os.cpu_count() or 1,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _executor
+
+
+async def process_photo(photo_path: str) -> None:
+    """Post-upload hook: build the photo's variants off the request path"""
+    if thumbnail_paths(photo_path) is None:
+        return
+    loop = asyncio.get_running_loop()
+    try:
+        await loop.run_in_executor(_get_executor(), generate_thumbnails, photo_path)
+    except Exception:
+        logger.exception("Thumbnail generation failed for %s", photo_path)
+
+
+def shutdown() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
@@ -3,37 +3,56 @@ Palestine Martyrs Backend API
 FastAPI server for managing martyrs, injured, and prisoners data
 """
 
-from fastapi import FastAPI, HTTPException, Depends, status, UploadFile, File
+from fastapi import FastAPI, HTTPException, Depends, status, UploadFile, File, Response, BackgroundTasks, Request, Query, WebSocket, WebSocketDisconnect
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, HTMLResponse, FileResponse
+from fastapi.responses import JSONResponse, HTMLResponse, StreamingResponse, ORJSONResponse
 from fastapi.staticfiles import StaticFiles
-from sqlalchemy import create_database, text
-from sqlalchemy.orm import Session
+from sqlalchemy import text, select, update, func, case, literal, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime, timedelta
 import jwt
-import bcrypt
 import os
+import time
 from typing import List, Optional
 import asyncio
 import json
 
-from database import engine, SessionLocal, init_db
+from database import engine, async_engine, init_db, get_async_db, write_lock, AsyncSessionLocal
+from pool_metrics import pool_status
 from models import User, Martyr, Injured, Prisoner
 from schemas import (
     UserCreate, UserLogin, UserResponse, 
     MartyrCreate, MartyrResponse, MartyrUpdate,
     InjuredCreate, InjuredResponse, InjuredUpdate,
     PrisonerCreate, PrisonerResponse, PrisonerUpdate,
-    StatusUpdate, StatsResponse
+    StatusUpdate, StatsResponse, BatchStatusUpdate, BatchStatusResponse,
+    SearchResult, SyncResponse
 )
-from config import get_settings
+from config import get_settings, on_settings_reload, reload_settings
+from pagination import NEXT_CURSOR_HEADER, keyset_order, apply_cursor, next_cursor
+from cache import TTLCache
+from passwords import hash_password, verify_password, password_pool_stats
+from uploads import ensure_upload_dirs, upload_url, store_upload, retain_files, release_files, purge_unreferenced, start_purger, stop_purger
+import images
+from static_files import load_asset, serve_asset, serve_upload
+from compression import CompressionMiddleware
+from records import RECORD_TYPES, get_record_type
+from search import search_records
+from duplicates import find_duplicates
+from conditional import check_collection, make_etag, not_modified
+from sync import collect_changes
+from broker import broker, publish_event, forward_events
+from bulk_import import RECORD_STATUSES, detect_format, import_records
+from export import MEDIA_TYPES, STREAMERS, parquet_available
+from serialization import parse_fields, response_columns, rows_to_dicts, fast_response
 
 # Initialize FastAPI app
 app = FastAPI(
     title="Palestine Martyrs API",
     description="Backend API for Palestine Martyrs Mobile Application",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
 # Settings
@@ -46,42 +65,76 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag", "Content-Range", "Accept-Ranges"],
+)
+
+# gzip/brotli for JSON listings and exports; tiny and already-encoded bodies pass through
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.compression_minimum_size,
+    gzip_level=settings.compression_gzip_level,
+    brotli_quality=settings.compression_brotli_quality,
 )
 
 # Security
 security = HTTPBearer()
 
+# Dashboard statistics cache (cleared on every write, expires after the TTL)
+stats_cache = TTLCache(maxsize=1, ttl=settings.stats_cache_ttl)
+
+# Auth caches: token -> user_id (skips jwt.decode), user_id -> user snapshot (skips SELECT)
+token_cache = TTLCache(maxsize=settings.auth_cache_size, ttl=settings.auth_cache_ttl)
+user_cache = TTLCache(maxsize=settings.auth_cache_size, ttl=settings.auth_cache_ttl)
+
+@on_settings_reload
+def resize_caches(new_settings):
+    stats_cache.ttl = new_settings.stats_cache_ttl
+    for cache in (token_cache, user_cache):
+        cache.maxsize = new_settings.auth_cache_size
+        cache.ttl = new_settings.auth_cache_ttl
+USER_SNAPSHOT_FIELDS = ("id", "username", "full_name", "user_type", "phone_number", "created_at", "last_login")
+
 # Mount static files for admin panel
 app.mount("/static", StaticFiles(directory="templates"), name="static")
 
+# Admin panel assets, precompressed once at startup (and again only if edited)
+ADMIN_HTML = "templates/admin.html"
+ADMIN_JS = "templates/admin.js"
+
 # Admin panel route
 @app.get("/admin", response_class=HTMLResponse)
-async def admin_panel():
+async def admin_panel(request: Request):
     """Admin panel web interface"""
     try:
-        with open("templates/admin.html", "r", encoding="utf-8") as f:
-            content = f.read()
-        return HTMLResponse(content=content)
+        return serve_asset(request, ADMIN_HTML, "text/html")
     except FileNotFoundError:
         raise HTTPException(status_code=404, detail="Admin panel not found")
 
 @app.get("/admin.js")
-async def admin_js():
+async def admin_js(request: Request):
     """Admin panel JavaScript"""
-    return FileResponse("templates/admin.js", media_type="application/javascript")
+    try:
+        return serve_asset(request, ADMIN_JS, "application/javascript")
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Admin panel not found")
 
 # Initialize database
 @app.on_event("startup")
 async def startup_event():
+    ensure_upload_dirs()
     init_db()
-
-# Database dependency
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+    for path in (ADMIN_HTML, ADMIN_JS):
+        if os.path.exists(path):
+            load_asset(path)
+    await broker.start()
+    # تنظيف الملفات المرفوعة التي لم يرتبط بها أي سجل
+    start_purger(AsyncSessionLocal)
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    stop_purger()
+    images.shutdown()
+    await broker.stop()
 
 # JWT token functions
 def create_access_token(data: dict):
@@ -91,19 +144,41 @@ def create_access_token(data: dict):
     return jwt.encode(to_encode, settings.jwt_secret, algorithm="HS256")
 
 def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    return decode_token(credentials.credentials)
+
+def decode_token(token: str) -> int:
+    """User id carried by a JWT, cached until the token (or the cache entry) expires"""
+    user_id = token_cache.get(token)
+    if user_id is not None:
+        return user_id
+    
     try:
-        payload = jwt.decode(credentials.credentials, settings.jwt_secret, algorithms=["HS256"])
+        payload = jwt.decode(token, settings.jwt_secret, algorithms=["HS256"])
         user_id: int = payload.get("user_id")
         if user_id is None:
             raise HTTPException(status_code=401, detail="Invalid token")
-        return user_id
     except jwt.PyJWTError:
         raise HTTPException(status_code=401, detail="Invalid token")
+    
+    # Never keep a token cached past its own expiry
+    remaining = payload.get("exp", 0) - time.time()
+    token_cache.set(token, user_id, ttl=min(settings.auth_cache_ttl, remaining))
+    return user_id
+
+def invalidate_user_cache(user_id: int):
+    """Drop the cached snapshot after the user record changes"""
+    user_cache.pop(user_id)
 
-def get_current_user(db: Session = Depends(get_db), user_id: int = Depends(verify_token)):
-    user = db.query(User).filter(User.id == user_id).first()
+async def get_current_user(db: AsyncSession = Depends(get_async_db), user_id: int = Depends(verify_token)):
+    snapshot = user_cache.get(user_id)
+    if snapshot is not None:
+        # A fresh transient instance per request, so callers never share state
+        return User(**snapshot)
+    
+    user = await db.get(User, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
+    user_cache.set(user_id, {field: getattr(user, field) for field in USER_SNAPSHOT_FIELDS})
     return user
 
 def admin_required(current_user: User = Depends(get_current_user)):
@@ -114,20 +189,21 @@ def admin_required(current_user: User = Depends(get_current_user)):
 # ====== AUTH ENDPOINTS ======
 
 @app.post("/auth/register", response_model=UserResponse)
-async def register(user_data: UserCreate, db: Session = Depends(get_db)):
+async def register(user_data: UserCreate, db: AsyncSession = Depends(get_async_db)):
     """تسجيل مستخدم جديد"""
     
     # Check if username exists
-    if db.query(User).filter(User.username == user_data.username).first():
+    existing = await db.scalar(select(User).where(User.username == user_data.username))
+    if existing:
         raise HTTPException(status_code=400, detail="Username already exists")
     
     # Hash password
-    hashed_password = bcrypt.hashpw(user_data.password.encode('utf-8'), bcrypt.gensalt())
+    hashed_password = await hash_password(user_data.password)
     
     # Create user
     db_user = User(
         username=user_data.username,
-        password=hashed_password.decode('utf-8'),
+        password=hashed_password,
         full_name=user_data.full_name,
         user_type=user_data.user_type,
         phone_number=user_data.phone_number,
@@ -135,27 +211,29 @@ async def register(user_data: UserCreate, db: Session = Depends(get_db)):
     )
     
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    stats_cache.clear()
+    await db.refresh(db_user)
     
     return UserResponse.from_orm(db_user)
 
 @app.post("/auth/login")
-async def login(user_data: UserLogin, db: Session = Depends(get_db)):
+async def login(user_data: UserLogin, db: AsyncSession = Depends(get_async_db)):
     """تسجيل دخول المستخدم"""
     
     # Find user
-    user = db.query(User).filter(User.username == user_data.username).first()
+    user = await db.scalar(select(User).where(User.username == user_data.username))
     if not user:
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
     # Verify password
-    if not bcrypt.checkpw(user_data.password.encode('utf-8'), user.password.encode('utf-8')):
+    if not await verify_password(user_data.password, user.password):
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
     # Update last login
     user.last_login = datetime.utcnow()
-    db.commit()
+    await db.commit()
+    invalidate_user_cache(user.id)
     
     # Create token
     token = create_access_token({"user_id": user.id, "username": user.username})
@@ -176,7 +254,7 @@ async def get_current_user_info(current_user: User = Depends(get_current_user)):
 @app.post("/martyrs", response_model=MartyrResponse)
 async def create_martyr(
     martyr_data: MartyrCreate, 
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """إضافة شهيد جديد"""
@@ -184,58 +262,89 @@ async def create_martyr(
     db_martyr = Martyr(
         **martyr_data.dict(),
         added_by_user_id=current_user.id,
-        status="pending",
-        created_at=datetime.utcnow()
+        status="pending"
     )
     
     db.add(db_martyr)
-    db.commit()
-    db.refresh(db_martyr)
+    await retain_files(db, martyr_data.photo_path, martyr_data.cv_file_path)
+    await db.commit()
+    stats_cache.clear()
+    await db.refresh(db_martyr)
+    await publish_event("created", "martyrs", [db_martyr.id], status=db_martyr.status, full_name=db_martyr.full_name)
     
-    return MartyrResponse.from_orm(db_martyr)
+    result = MartyrResponse.from_orm(db_martyr)
+    # مرشحات التكرار: نفس الاسم والعائلة والتاريخ، عبر فهرس مفتاح الحجب
+    result.possible_duplicates = await find_duplicates(db, Martyr, db_martyr)
+    return result
 
 @app.get("/martyrs", response_model=List[MartyrResponse])
 async def get_martyrs(
+    request: Request,
+    response: Response,
     skip: int = 0, 
     limit: int = 100,
     status: Optional[str] = None,
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """قائمة الشهداء"""
     
-    query = db.query(Martyr)
+    # fields=id,full_name,status: أعمدة محددة فقط من قاعدة البيانات وفي الاستجابة
+    selected = parse_fields(fields, MartyrResponse)
+    filters = []
     
     # للمستخدم العادي: عرض بياناته فقط
     if current_user.user_type != "admin":
-        query = query.filter(Martyr.added_by_user_id == current_user.id)
+        filters.append(Martyr.added_by_user_id == current_user.id)
     
     # فلترة حسب الحالة
     if status:
-        query = query.filter(Martyr.status == status)
+        filters.append(Martyr.status == status)
+    
+    # نسخة من بحثين في الفهارس: إن لم يتغير شيء نرد 304 دون تحميل السجلات
+    unchanged = await check_collection(request, response, db, Martyr, current_user.id)
+    if unchanged:
+        return unchanged
+    
+    # أعمدة الاستجابة فقط كصفوف، بلا كائنات ORM
+    query = select(*response_columns(Martyr, MartyrResponse, selected)).where(*filters)
+    
+    # ترقيم بالمؤشر: ثابت التكلفة مهما كانت الصفحة عميقة
+    query = keyset_order(query, Martyr)
+    if cursor:
+        query = apply_cursor(query, Martyr, cursor)
+    else:
+        query = query.offset(skip)
     
-    martyrs = query.offset(skip).limit(limit).all()
-    return [MartyrResponse.from_orm(martyr) for martyr in martyrs]
+    martyrs = (await db.execute(query.limit(limit))).all()
+    
+    cursor_value = next_cursor(martyrs, limit)
+    if cursor_value:
+        response.headers[NEXT_CURSOR_HEADER] = cursor_value
+    return fast_response(rows_to_dicts(martyrs, Martyr, MartyrResponse, selected), response)
 
 @app.put("/martyrs/{martyr_id}/status", response_model=MartyrResponse)
 async def update_martyr_status(
     martyr_id: int,
     status_data: StatusUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     admin_user: User = Depends(admin_required)
 ):
     """تحديث حالة الشهيد (مسؤول فقط)"""
     
-    martyr = db.query(Martyr).filter(Martyr.id == martyr_id).first()
+    martyr = await db.get(Martyr, martyr_id)
     if not martyr:
         raise HTTPException(status_code=404, detail="Martyr not found")
     
     martyr.status = status_data.status
     martyr.admin_notes = status_data.admin_notes
-    martyr.updated_at = datetime.utcnow()
     
-    db.commit()
-    db.refresh(martyr)
+    await db.commit()
+    stats_cache.clear()
+    await db.refresh(martyr)
+    await publish_event("status_changed", "martyrs", [martyr.id], status=martyr.status)
     
     return MartyrResponse.from_orm(martyr)
 
@@ -244,7 +353,7 @@ async def update_martyr_status(
 @app.post("/injured", response_model=InjuredResponse)
 async def create_injured(
     injured_data: InjuredCreate, 
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """إضافة جريح جديد"""
@@ -252,56 +361,84 @@ async def create_injured(
     db_injured = Injured(
         **injured_data.dict(),
         added_by_user_id=current_user.id,
-        status="pending",
-        created_at=datetime.utcnow()
+        status="pending"
     )
     
     db.add(db_injured)
-    db.commit()
-    db.refresh(db_injured)
+    await retain_files(db, injured_data.photo_path, injured_data.cv_file_path)
+    await db.commit()
+    stats_cache.clear()
+    await db.refresh(db_injured)
+    await publish_event("created", "injured", [db_injured.id], status=db_injured.status, full_name=db_injured.full_name)
     
-    return InjuredResponse.from_orm(db_injured)
+    result = InjuredResponse.from_orm(db_injured)
+    # مرشحات التكرار: نفس الاسم والعائلة والتاريخ، عبر فهرس مفتاح الحجب
+    result.possible_duplicates = await find_duplicates(db, Injured, db_injured)
+    return result
 
 @app.get("/injured", response_model=List[InjuredResponse])
 async def get_injured(
+    request: Request,
+    response: Response,
     skip: int = 0, 
     limit: int = 100,
     status: Optional[str] = None,
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """قائمة الجرحى"""
     
-    query = db.query(Injured)
+    selected = parse_fields(fields, InjuredResponse)
+    filters = []
     
     if current_user.user_type != "admin":
-        query = query.filter(Injured.added_by_user_id == current_user.id)
+        filters.append(Injured.added_by_user_id == current_user.id)
     
     if status:
-        query = query.filter(Injured.status == status)
+        filters.append(Injured.status == status)
+    
+    unchanged = await check_collection(request, response, db, Injured, current_user.id)
+    if unchanged:
+        return unchanged
+    
+    query = select(*response_columns(Injured, InjuredResponse, selected)).where(*filters)
+    
+    # ترقيم بالمؤشر: ثابت التكلفة مهما كانت الصفحة عميقة
+    query = keyset_order(query, Injured)
+    if cursor:
+        query = apply_cursor(query, Injured, cursor)
+    else:
+        query = query.offset(skip)
+    
+    injured = (await db.execute(query.limit(limit))).all()
     
-    injured = query.offset(skip).limit(limit).all()
-    return [InjuredResponse.from_orm(injured_person) for injured_person in injured]
+    cursor_value = next_cursor(injured, limit)
+    if cursor_value:
+        response.headers[NEXT_CURSOR_HEADER] = cursor_value
+    return fast_response(rows_to_dicts(injured, Injured, InjuredResponse, selected), response)
 
 @app.put("/injured/{injured_id}/status", response_model=InjuredResponse)
 async def update_injured_status(
     injured_id: int,
     status_data: StatusUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     admin_user: User = Depends(admin_required)
 ):
     """تحديث حالة الجريح (مسؤول فقط)"""
     
-    injured = db.query(Injured).filter(Injured.id == injured_id).first()
+    injured = await db.get(Injured, injured_id)
     if not injured:
         raise HTTPException(status_code=404, detail="Injured person not found")
     
     injured.status = status_data.status
     injured.admin_notes = status_data.admin_notes
-    injured.updated_at = datetime.utcnow()
     
-    db.commit()
-    db.refresh(injured)
+    await db.commit()
+    stats_cache.clear()
+    await db.refresh(injured)
+    await publish_event("status_changed", "injured", [injured.id], status=injured.status)
     
     return InjuredResponse.from_orm(injured)
 
@@ -310,7 +447,7 @@ async def update_injured_status(
 @app.post("/prisoners", response_model=PrisonerResponse)
 async def create_prisoner(
     prisoner_data: PrisonerCreate, 
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """إضافة أسير جديد"""
@@ -318,151 +455,433 @@ async def create_prisoner(
     db_prisoner = Prisoner(
         **prisoner_data.dict(),
         added_by_user_id=current_user.id,
-        status="pending",
-        created_at=datetime.utcnow()
+        status="pending"
     )
     
     db.add(db_prisoner)
-    db.commit()
-    db.refresh(db_prisoner)
+    await retain_files(db, prisoner_data.photo_path, prisoner_data.cv_file_path)
+    await db.commit()
+    stats_cache.clear()
+    await db.refresh(db_prisoner)
+    await publish_event("created", "prisoners", [db_prisoner.id], status=db_prisoner.status, full_name=db_prisoner.full_name)
     
-    return PrisonerResponse.from_orm(db_prisoner)
+    result = PrisonerResponse.from_orm(db_prisoner)
+    # مرشحات التكرار: نفس الاسم والعائلة والتاريخ، عبر فهرس مفتاح الحجب
+    result.possible_duplicates = await find_duplicates(db, Prisoner, db_prisoner)
+    return result
 
 @app.get("/prisoners", response_model=List[PrisonerResponse])
 async def get_prisoners(
+    request: Request,
+    response: Response,
     skip: int = 0, 
     limit: int = 100,
     status: Optional[str] = None,
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """قائمة الأسرى"""
     
-    query = db.query(Prisoner)
+    selected = parse_fields(fields, PrisonerResponse)
+    filters = []
     
     if current_user.user_type != "admin":
-        query = query.filter(Prisoner.added_by_user_id == current_user.id)
+        filters.append(Prisoner.added_by_user_id == current_user.id)
     
     if status:
-        query = query.filter(Prisoner.status == status)
+        filters.append(Prisoner.status == status)
+    
+    unchanged = await check_collection(request, response, db, Prisoner, current_user.id)
+    if unchanged:
+        return unchanged
+    
+    query = select(*response_columns(Prisoner, PrisonerResponse, selected)).where(*filters)
     
-    prisoners = query.offset(skip).limit(limit).all()
-    return [PrisonerResponse.from_orm(prisoner) for prisoner in prisoners]
+    # ترقيم بالمؤشر: ثابت التكلفة مهما كانت الصفحة عميقة
+    query = keyset_order(query, Prisoner)
+    if cursor:
+        query = apply_cursor(query, Prisoner, cursor)
+    else:
+        query = query.offset(skip)
+    
+    prisoners = (await db.execute(query.limit(limit))).all()
+    
+    cursor_value = next_cursor(prisoners, limit)
+    if cursor_value:
+        response.headers[NEXT_CURSOR_HEADER] = cursor_value
+    return fast_response(rows_to_dicts(prisoners, Prisoner, PrisonerResponse, selected), response)
 
 @app.put("/prisoners/{prisoner_id}/status", response_model=PrisonerResponse)
 async def update_prisoner_status(
     prisoner_id: int,
     status_data: StatusUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     admin_user: User = Depends(admin_required)
 ):
     """تحديث حالة الأسير (مسؤول فقط)"""
     
-    prisoner = db.query(Prisoner).filter(Prisoner.id == prisoner_id).first()
+    prisoner = await db.get(Prisoner, prisoner_id)
     if not prisoner:
         raise HTTPException(status_code=404, detail="Prisoner not found")
     
     prisoner.status = status_data.status
     prisoner.admin_notes = status_data.admin_notes
-    prisoner.updated_at = datetime.utcnow()
     
-    db.commit()
-    db.refresh(prisoner)
+    await db.commit()
+    stats_cache.clear()
+    await db.refresh(prisoner)
+    await publish_event("status_changed", "prisoners", [prisoner.id], status=prisoner.status)
     
     return PrisonerResponse.from_orm(prisoner)
 
+# ====== SYNC ENDPOINTS ======
+
+@app.get("/sync", response_model=SyncResponse)
+async def sync_changes(
+    since: Optional[str] = None,
+    limit: int = Query(500, ge=1, le=5000),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    """التغييرات منذ آخر مزامنة: السجلات المضافة أو المعدلة والمحذوفة"""
+    
+    # since: رمز next_since من المزامنة السابقة، أو تاريخ ISO، أو فارغ لمزامنة كاملة
+    user_id = None if current_user.user_type == "admin" else current_user.id
+    return await collect_changes(db, since, user_id, limit)
+
+# ====== MODERATION FEED ======
+
+# Seconds a moderation socket may stay open without authenticating
+WS_AUTH_TIMEOUT = 10
+
+@app.websocket("/ws/moderation")
+async def moderation_feed(websocket: WebSocket):
+    """بث مباشر لأحداث الإشراف: إضافة السجلات وتغيير حالتها وحذفها (مسؤول فقط)"""
+    
+    # المتصفح لا يرسل ترويسة Authorization مع WebSocket، والرابط يُسجَّل في سجلات الوصول،
+    # لذا يرسل العميل الرمز في أول رسالة: {"token": "..."}
+    await websocket.accept()
+    try:
+        message = await asyncio.wait_for(websocket.receive_json(), timeout=WS_AUTH_TIMEOUT)
+        async with AsyncSessionLocal() as db:
+            user = await get_current_user(db, decode_token(message["token"]))
+    except WebSocketDisconnect:
+        return
+    except (asyncio.TimeoutError, HTTPException, KeyError, TypeError, ValueError):
+        await websocket.close(code=1008)
+        return
+    if user.user_type != "admin":
+        await websocket.close(code=1008)
+        return
+    
+    async with broker.subscribe() as queue:
+        await forward_events(websocket, queue)
+
+# ====== SEARCH ENDPOINTS ======
+
+@app.get("/search", response_model=List[SearchResult])
+async def search(
+    q: str = Query(..., min_length=1, max_length=200),
+    types: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    """بحث بالاسم أو الكنية أو العائلة في جميع السجلات، مرتب حسب التطابق"""
+    
+    names = types.split(",") if types else list(RECORD_TYPES)
+    for name in names:
+        get_record_type(name)
+    
+    # المستخدم العادي يبحث في سجلاته فقط
+    user_id = None if current_user.user_type == "admin" else current_user.id
+    return await search_records(db, q, names, user_id, limit)
+
 # ====== ADMIN ENDPOINTS ======
 
+# Ids per UPDATE ... WHERE id IN (...), well under SQLite/asyncpg parameter limits
+BATCH_STATUS_CHUNK = 1000
+
+@app.put("/admin/status/batch", response_model=BatchStatusResponse)
+async def update_status_batch(
+    batch: BatchStatusUpdate,
+    db: AsyncSession = Depends(get_async_db),
+    admin_user: User = Depends(admin_required)
+):
+    """تحديث حالة عدة سجلات دفعة واحدة (مسؤول فقط)"""
+    
+    targets = [
+        ("martyrs", Martyr, batch.martyr_ids),
+        ("injured", Injured, batch.injured_ids),
+        ("prisoners", Prisoner, batch.prisoner_ids),
+    ]
+    can_return = db.bind.dialect.update_returning
+    updated = {}
+    not_found = {}
+    changed_ids = {}
+    
+    # معاملة واحدة لكل الجداول، واستعلام UPDATE واحد لكل جدول (مقسّم لكل 1000 معرّف)
+    async with write_lock():
+        for name, model, ids in targets:
+            ids = sorted(set(ids))
+            changed = set()
+            count = 0
+            for start in range(0, len(ids), BATCH_STATUS_CHUNK):
+                chunk = ids[start:start + BATCH_STATUS_CHUNK]
+                # updated_at is stamped per statement, now that this writer holds the lock
+                statement = (
+                    update(model)
+                    .where(model.id.in_(chunk))
+                    .values(status=batch.status, admin_notes=batch.admin_notes)
+                    .execution_options(synchronize_session=False)
+                )
+                if can_return:
+                    result = await db.execute(statement.returning(model.id))
+                    changed.update(result.scalars().all())
+                else:
+                    result = await db.execute(statement)
+                    count += result.rowcount
+            updated[name] = len(changed) if can_return else count
+            not_found[name] = [record_id for record_id in ids if record_id not in changed] if can_return else []
+            changed_ids[name] = sorted(changed) if can_return else ids
+        await db.commit()
+    stats_cache.clear()
+    
+    for name, ids in changed_ids.items():
+        if ids:
+            await publish_event("status_changed", name, ids, status=batch.status)
+    
+    return BatchStatusResponse(status=batch.status, updated=updated, not_found=not_found)
+
 @app.get("/admin/stats", response_model=StatsResponse)
 async def get_statistics(
-    db: Session = Depends(get_db),
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
     admin_user: User = Depends(admin_required)
 ):
     """إحصائيات عامة (مسؤول فقط)"""
     
-    martyrs_count = db.query(Martyr).count()
-    injured_count = db.query(Injured).count()
-    prisoners_count = db.query(Prisoner).count()
-    
-    pending_martyrs = db.query(Martyr).filter(Martyr.status == "pending").count()
-    pending_injured = db.query(Injured).filter(Injured.status == "pending").count()
-    pending_prisoners = db.query(Prisoner).filter(Prisoner.status == "pending").count()
-    
-    users_count = db.query(User).count()
+    stats = stats_cache.get("stats")
+    if stats is None:
+        stats = await compute_statistics(db)
+        stats_cache.set("stats", stats)
+    
+    # الوسم مشتق من الأرقام نفسها: الاستطلاع دون تغيير لا يكلف أي استعلام
+    unchanged = not_modified(request, response, make_etag("stats", *stats.dict().values()))
+    return unchanged or stats
+
+async def compute_statistics(db: AsyncSession) -> StatsResponse:
+    """Counts for the admin dashboard"""
+    # استعلام واحد مجمّع بدلاً من سبعة استعلامات COUNT منفصلة
+    def table_counts(model, name):
+        return select(
+            literal(name).label("name"),
+            func.count().label("total"),
+            func.coalesce(func.sum(case((model.status == "pending", 1), else_=0)), 0).label("pending"),
+        ).select_from(model)
+    
+    users_counts = select(
+        literal("users").label("name"),
+        func.count().label("total"),
+        literal(0).label("pending"),
+    ).select_from(User)
+    
+    rows = (await db.execute(union_all(
+        table_counts(Martyr, "martyrs"),
+        table_counts(Injured, "injured"),
+        table_counts(Prisoner, "prisoners"),
+        users_counts,
+    ))).all()
+    counts = {row.name: row for row in rows}
     
     return StatsResponse(
-        total_martyrs=martyrs_count,
-        total_injured=injured_count,
-        total_prisoners=prisoners_count,
-        pending_martyrs=pending_martyrs,
-        pending_injured=pending_injured,
-        pending_prisoners=pending_prisoners,
-        total_users=users_count
+        total_martyrs=counts["martyrs"].total,
+        total_injured=counts["injured"].total,
+        total_prisoners=counts["prisoners"].total,
+        pending_martyrs=counts["martyrs"].pending,
+        pending_injured=counts["injured"].pending,
+        pending_prisoners=counts["prisoners"].pending,
+        total_users=counts["users"].total
     )
 
+@app.post("/admin/settings/reload")
+async def reload_configuration(admin_user: User = Depends(admin_required)):
+    """إعادة قراءة الإعدادات من البيئة وملف .env دون إعادة التشغيل (مسؤول فقط)"""
+    
+    reload_settings()
+    return {"message": "Settings reloaded successfully"}
+
+@app.post("/admin/uploads/purge")
+async def purge_uploads(
+    db: AsyncSession = Depends(get_async_db),
+    admin_user: User = Depends(admin_required)
+):
+    """حذف الملفات المرفوعة التي لا يشير إليها أي سجل منذ UPLOAD_ORPHAN_TTL (مسؤول فقط)"""
+    
+    purged = await purge_unreferenced(db)
+    return {"purged": purged}
+
 @app.get("/admin/users", response_model=List[UserResponse])
 async def get_users(
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     admin_user: User = Depends(admin_required)
 ):
     """قائمة المستخدمين (مسؤول فقط)"""
     
-    users = db.query(User).offset(skip).limit(limit).all()
+    users = (await db.scalars(select(User).offset(skip).limit(limit))).all()
     return [UserResponse.from_orm(user) for user in users]
 
+@app.delete("/admin/records/{record_type}/{record_id}")
+async def delete_record(
+    record_type: str,
+    record_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    admin_user: User = Depends(admin_required)
+):
+    """حذف سجل نهائياً (مسؤول فقط)"""
+    
+    record = get_record_type(record_type)
+    db_record = await db.get(record.model, record_id)
+    if not db_record:
+        raise HTTPException(status_code=404, detail="Record not found")
+    
+    # يُسجَّل شاهد حذف تلقائياً ليصل الحذف إلى التطبيقات عبر /sync
+    await release_files(db, db_record.photo_path, db_record.cv_file_path)
+    await db.delete(db_record)
+    await db.commit()
+    stats_cache.clear()
+    await publish_event("deleted", record.name, [record_id])
+    
+    return {"message": "Record deleted successfully"}
+
+@app.get("/admin/duplicates/{record_type}/{record_id}")
+async def get_duplicates(
+    record_type: str,
+    record_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    admin_user: User = Depends(admin_required)
+):
+    """السجلات المحتمل تكرارها مع سجل معين (مسؤول فقط)"""
+    
+    record = get_record_type(record_type)
+    db_record = await db.get(record.model, record_id)
+    if not db_record:
+        raise HTTPException(status_code=404, detail="Record not found")
+    
+    ids = await find_duplicates(db, record.model, db_record)
+    duplicates = (await db.scalars(select(record.model).where(record.model.id.in_(ids)))).all() if ids else []
+    return [record.response_schema.from_orm(duplicate) for duplicate in duplicates]
+
+@app.post("/admin/import/{record_type}")
+async def bulk_import(
+    record_type: str,
+    file: UploadFile = File(...),
+    file_format: Optional[str] = Query(None, alias="format"),
+    batch_size: Optional[int] = Query(None, ge=1, le=10000),
+    status: str = "pending",
+    db: AsyncSession = Depends(get_async_db),
+    admin_user: User = Depends(admin_required)
+):
+    """استيراد جماعي من ملف CSV أو NDJSON (مسؤول فقط)"""
+    
+    record = get_record_type(record_type)
+    if status not in RECORD_STATUSES:
+        raise HTTPException(status_code=400, detail="status must be pending, approved, or rejected")
+    try:
+        fmt = detect_format(file.filename, file.content_type, file_format)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    report = await import_records(
+        db, record, file.file, fmt, admin_user.id,
+        status=status, batch_size=batch_size
+    )
+    stats_cache.clear()
+    if report.inserted:
+        await publish_event("imported", record.name, [], status=status, count=report.inserted)
+    
+    return report.as_dict()
+
+@app.get("/admin/export/{record_type}")
+async def bulk_export(
+    record_type: str,
+    export_format: str = Query("ndjson", alias="format"),
+    admin_user: User = Depends(admin_required)
+):
+    """تصدير كامل للسجلات المعتمدة بصيغة NDJSON أو CSV أو Parquet (مسؤول فقط)"""
+    
+    record = get_record_type(record_type)
+    if export_format not in STREAMERS:
+        raise HTTPException(status_code=400, detail="format must be ndjson, csv, or parquet")
+    if export_format == "parquet" and not parquet_available():
+        raise HTTPException(status_code=501, detail="Parquet export requires pyarrow")
+    
+    filename = f"{record.name}-approved.{export_format}"
+    return StreamingResponse(
+        STREAMERS[export_format](record),
+        media_type=MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
 # ====== FILE UPLOAD ENDPOINTS ======
 
 @app.post("/upload/photo")
 async def upload_photo(
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """رفع صورة"""
     
-    if not file.content_type.startswith("image/"):
-        raise HTTPException(status_code=400, detail="File must be an image")
-    
-    # إنشاء مجلد الصور إذا لم يكن موجوداً
-    os.makedirs("uploads/photos", exist_ok=True)
+    if file.content_type not in settings.allowed_image_types:
+        raise HTTPException(status_code=400, detail="File must be a JPEG, PNG or GIF image")
     
-    # إنشاء اسم ملف فريد
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"{timestamp}_{current_user.id}_{file.filename}"
-    file_path = f"uploads/photos/{filename}"
+    # تخزين حسب المحتوى: الصورة المكررة تعاد فوراً دون كتابة على القرص
+    stored, created = await store_upload(db, file, "photos")
     
-    # حفظ الملف
-    with open(file_path, "wb") as buffer:
-        content = await file.read()
-        buffer.write(content)
+    # الصور المصغرة (WebP بدون EXIF) تُولَّد بعد إرسال الاستجابة
+    if created:
+        background_tasks.add_task(images.process_photo, stored.path)
     
-    return {"file_path": file_path, "filename": filename}
+    return {
+        "file_path": upload_url(stored.path),
+        "filename": os.path.basename(stored.path),
+        "size": stored.size,
+        "sha256": stored.sha256,
+        "deduplicated": not created
+    }
 
 @app.post("/upload/document")
 async def upload_document(
     file: UploadFile = File(...),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """رفع وثيقة"""
     
-    allowed_types = ["application/pdf", "application/msword", 
-                     "application/vnd.openxmlformats-officedocument.wordprocessingml.document"]
-    
-    if file.content_type not in allowed_types:
+    if file.content_type not in settings.allowed_document_types:
         raise HTTPException(status_code=400, detail="File must be PDF or Word document")
     
-    os.makedirs("uploads/documents", exist_ok=True)
+    stored, created = await store_upload(db, file, "documents")
     
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"{timestamp}_{current_user.id}_{file.filename}"
-    file_path = f"uploads/documents/{filename}"
-    
-    with open(file_path, "wb") as buffer:
-        content = await file.read()
-        buffer.write(content)
-    
-    return {"file_path": file_path, "filename": filename}
+    return {
+        "file_path": upload_url(stored.path),
+        "filename": os.path.basename(stored.path),
+        "size": stored.size,
+        "sha256": stored.sha256,
+        "deduplicated": not created
+    }
+
+@app.api_route("/uploads/{file_path:path}", methods=["GET", "HEAD"])
+async def get_upload(file_path: str, request: Request):
+    """تقديم الملفات المرفوعة مع ETag ودعم Range وتخزين مؤقت طويل"""
+    return await serve_upload(request, file_path)
 
 # ====== HEALTH CHECK ======
 
@@ -475,6 +894,15 @@ async def health_check():
         "version": "1.0.0"
     }
 
+@app.get("/metrics")
+async def metrics(admin_user: User = Depends(admin_required)):
+    """مؤشرات الأداء الداخلية (مسؤول فقط)"""
+    return {
+        "password_hashing": password_pool_stats(),
+        "database_pool": pool_status(async_engine.sync_engine),
+        "moderation_subscribers": broker.subscriber_count,
+    }
+
 # Database initialization endpoint
 @app.post("/init-db")
 async def initialize_database():
@@ -0,0 +1,48 @@
+"""Composite indexes for listing filters and stats counts
+
+Revision ID: 0001_listing_indexes
+Revises:
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0001_listing_indexes"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+TABLES = ("martyrs", "injured", "prisoners")
+
+
+def _indexes(table):
+    return [
+        (f"ix_{table}_owner_status_created", ["added_by_user_id", "status", "created_at"]),
+        (f"ix_{table}_status_created", ["status", "created_at"]),
+        (f"ix_{table}_created_id", ["created_at", "id"]),
+    ]
+
+
+def upgrade():
+    # Databases bootstrapped by init_db() already carry these from create_all
+    inspector = sa.inspect(op.get_bind())
+    for table in TABLES:
+        if not inspector.has_table(table):
+            continue
+        existing = {index["name"] for index in inspector.get_indexes(table)}
+        for name, columns in _indexes(table):
+            if name not in existing:
+                op.create_index(name, table, columns)
+
+
+def downgrade():
+    inspector = sa.inspect(op.get_bind())
+    for table in TABLES:
+        if not inspector.has_table(table):
+            continue
+        existing = {index["name"] for index in inspector.get_indexes(table)}
+        for name, _ in _indexes(table):
+            if name in existing:
+                op.drop_index(name, table_name=table)
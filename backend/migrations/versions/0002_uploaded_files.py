@@ -0,0 +1,36 @@
+"""Content-addressed upload index
+
+Revision ID: 0002_uploaded_files
+Revises: 0001_listing_indexes
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0002_uploaded_files"
+down_revision = "0001_listing_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if sa.inspect(op.get_bind()).has_table("uploaded_files"):
+        return
+    op.create_table(
+        "uploaded_files",
+        sa.Column("sha256", sa.String(64), primary_key=True),
+        sa.Column("kind", sa.String(20), nullable=False),
+        sa.Column("path", sa.String(255), nullable=False),
+        sa.Column("size", sa.BigInteger(), nullable=False),
+        sa.Column("content_type", sa.String(100), nullable=True),
+        sa.Column("ref_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+    )
+    op.create_index("ix_uploaded_files_path", "uploaded_files", ["path"], unique=True)
+
+
+def downgrade():
+    op.drop_index("ix_uploaded_files_path", table_name="uploaded_files")
+    op.drop_table("uploaded_files")
@@ -0,0 +1,45 @@
+"""Normalized search_text column plus trigram / FTS5 search index
+
+Revision ID: 0003_search_text
+Revises: 0002_uploaded_files
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0003_search_text"
+down_revision = "0002_uploaded_files"
+branch_labels = None
+depends_on = None
+
+TABLES = ("martyrs", "injured", "prisoners")
+
+
+def upgrade():
+    from search import backfill_search_text, ensure_search_index
+
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    for table in TABLES:
+        if not inspector.has_table(table):
+            continue
+        columns = {column["name"] for column in inspector.get_columns(table)}
+        if "search_text" not in columns:
+            op.add_column(table, sa.Column("search_text", sa.Text(), nullable=True))
+    backfill_search_text(bind)
+    ensure_search_index(bind)
+
+
+def downgrade():
+    bind = op.get_bind()
+    for table in TABLES:
+        if bind.dialect.name == "sqlite":
+            for suffix in ("insert", "update", "delete"):
+                op.execute(f"DROP TRIGGER IF EXISTS {table}_fts_{suffix}")
+            op.execute(f"DROP TABLE IF EXISTS {table}_fts")
+        elif bind.dialect.name == "postgresql":
+            op.execute(f"DROP INDEX IF EXISTS ix_{table}_search_trgm")
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column("search_text")
@@ -0,0 +1,42 @@
+"""Blocking-key index for duplicate detection
+
+Revision ID: 0004_dedupe_key
+Revises: 0003_search_text
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0004_dedupe_key"
+down_revision = "0003_search_text"
+branch_labels = None
+depends_on = None
+
+TABLES = ("martyrs", "injured", "prisoners")
+
+
+def upgrade():
+    from duplicates import backfill_dedupe_keys
+    from records import RECORD_TYPES
+
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    tables = []
+    for table in TABLES:
+        if not inspector.has_table(table):
+            continue
+        columns = {column["name"] for column in inspector.get_columns(table)}
+        if "dedupe_key" not in columns:
+            op.add_column(table, sa.Column("dedupe_key", sa.String(32), nullable=True))
+            op.create_index(f"ix_{table}_dedupe_key", table, ["dedupe_key"])
+        tables.append(RECORD_TYPES[table].model.__table__)
+    backfill_dedupe_keys(bind, tables)
+
+
+def downgrade():
+    for table in TABLES:
+        op.drop_index(f"ix_{table}_dedupe_key", table_name=table)
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column("dedupe_key")
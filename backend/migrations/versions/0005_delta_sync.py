@@ -0,0 +1,47 @@
+"""Tombstones and (changed_at, id) indexes for delta sync
+
+Revision ID: 0005_delta_sync
+Revises: 0004_dedupe_key
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0005_delta_sync"
+down_revision = "0004_dedupe_key"
+branch_labels = None
+depends_on = None
+
+TABLES = ("martyrs", "injured", "prisoners")
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    for table in TABLES:
+        if not inspector.has_table(table):
+            continue
+        existing = {index["name"] for index in inspector.get_indexes(table)}
+        if f"ix_{table}_changed_id" not in existing:
+            op.create_index(
+                f"ix_{table}_changed_id", table,
+                [sa.text("coalesce(updated_at, created_at)"), "id"],
+            )
+    if not inspector.has_table("deleted_records"):
+        op.create_table(
+            "deleted_records",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("record_type", sa.String(20), nullable=False),
+            sa.Column("record_id", sa.Integer(), nullable=False),
+            sa.Column("added_by_user_id", sa.Integer(), nullable=False),
+            sa.Column("deleted_at", sa.DateTime(), nullable=False),
+        )
+        op.create_index("ix_deleted_records_deleted_id", "deleted_records", ["deleted_at", "id"])
+
+
+def downgrade():
+    op.drop_index("ix_deleted_records_deleted_id", table_name="deleted_records")
+    op.drop_table("deleted_records")
+    for table in TABLES:
+        op.drop_index(f"ix_{table}_changed_id", table_name=table)
@@ -0,0 +1,73 @@
+"""NOT NULL created_at and (created_at, id)-suffixed listing indexes for keyset seeks
+
+Revision ID: 0006_keyset_indexes
+Revises: 0005_delta_sync
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0006_keyset_indexes"
+down_revision = "0005_delta_sync"
+branch_labels = None
+depends_on = None
+
+TABLES = ("martyrs", "injured", "prisoners")
+
+
+def _old_indexes(table):
+    return [
+        (f"ix_{table}_owner_status_created", ["added_by_user_id", "status", "created_at"]),
+        (f"ix_{table}_status_created", ["status", "created_at"]),
+    ]
+
+
+def _new_indexes(table):
+    return [
+        (f"ix_{table}_owner_status_created_id", ["added_by_user_id", "status", "created_at", "id"]),
+        (f"ix_{table}_owner_created_id", ["added_by_user_id", "created_at", "id"]),
+        (f"ix_{table}_status_created_id", ["status", "created_at", "id"]),
+    ]
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    for table in TABLES:
+        if not inspector.has_table(table):
+            continue
+        # Rows written without a timestamp take their last change time, else now
+        op.execute(
+            f"UPDATE {table} SET created_at = coalesce(updated_at, CURRENT_TIMESTAMP) "
+            "WHERE created_at IS NULL"
+        )
+        if bind.dialect.name != "sqlite":
+            # SQLite can only add NOT NULL by rebuilding the table, which would drop
+            # the FTS triggers and expression indexes; the backfill is enough there
+            op.alter_column(table, "created_at", existing_type=sa.DateTime(), nullable=False)
+
+        existing = {index["name"] for index in inspector.get_indexes(table)}
+        for name, _ in _old_indexes(table):
+            if name in existing:
+                op.drop_index(name, table_name=table)
+        for name, columns in _new_indexes(table):
+            if name not in existing:
+                op.create_index(name, table, columns)
+
+
+def downgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    for table in TABLES:
+        if not inspector.has_table(table):
+            continue
+        existing = {index["name"] for index in inspector.get_indexes(table)}
+        for name, _ in _new_indexes(table):
+            if name in existing:
+                op.drop_index(name, table_name=table)
+        for name, columns in _old_indexes(table):
+            op.create_index(name, table, columns)
+        if bind.dialect.name != "sqlite":
+            op.alter_column(table, "created_at", existing_type=sa.DateTime(), nullable=True)
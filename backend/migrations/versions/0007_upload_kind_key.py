@@ -0,0 +1,43 @@
+"""Key uploaded_files on (sha256, kind) so photos and documents never share a blob
+
+Revision ID: 0007_upload_kind_key
+Revises: 0006_keyset_indexes
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0007_upload_kind_key"
+down_revision = "0006_keyset_indexes"
+branch_labels = None
+depends_on = None
+
+
+def _set_primary_key(columns):
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if not inspector.has_table("uploaded_files"):
+        return
+    current = inspector.get_pk_constraint("uploaded_files")
+    if current["constrained_columns"] == columns:
+        return
+    # uploaded_files has no triggers, so SQLite's table rebuild is safe here
+    with op.batch_alter_table("uploaded_files", recreate="auto") as batch_op:
+        if current.get("name"):
+            batch_op.drop_constraint(current["name"], type_="primary")
+        batch_op.create_primary_key("uploaded_files_pkey", columns)
+
+
+def upgrade():
+    _set_primary_key(["sha256", "kind"])
+
+
+def downgrade():
+    # Rows sharing a sha256 across kinds must go first; keep the photo
+    op.execute(
+        "DELETE FROM uploaded_files WHERE kind <> 'photos' AND sha256 IN "
+        "(SELECT sha256 FROM uploaded_files WHERE kind = 'photos')"
+    )
+    _set_primary_key(["sha256"])
@@ -3,12 +3,13 @@ Database Models for Palestine Martyrs API
 SQLAlchemy ORM models
 """
 
-from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey
-from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, Text, ForeignKey, Index, event, func, insert
 from sqlalchemy.orm import relationship
 from datetime import datetime
 
-Base = declarative_base()
+from database import Base
+from arabic import build_search_text
+from duplicates import EVENT_DATE_COLUMNS, blocking_key
 
 class User(Base):
     __tablename__ = "users"
@@ -29,6 +30,14 @@ class User(Base):
 
 class Martyr(Base):
     __tablename__ = "martyrs"
+    __table_args__ = (
+        # Listing filters: own records (by status), admin by status, newest first;
+        # each ends in (created_at, id) so a keyset cursor is a single index seek
+        Index("ix_martyrs_owner_status_created_id", "added_by_user_id", "status", "created_at", "id"),
+        Index("ix_martyrs_owner_created_id", "added_by_user_id", "created_at", "id"),
+        Index("ix_martyrs_status_created_id", "status", "created_at", "id"),
+        Index("ix_martyrs_created_id", "created_at", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     full_name = Column(String(100), nullable=False)
@@ -48,14 +57,26 @@ class Martyr(Base):
     status = Column(String(20), default="pending")  # 'pending', 'approved', 'rejected'
     admin_notes = Column(Text, nullable=True)
     added_by_user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, nullable=True)
+    # Stamped when the INSERT/UPDATE executes, i.e. inside the SQLite writer queue, so a
+    # write never commits long after its timestamp (see SYNC_SETTLE in sync.py)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, nullable=True, onupdate=datetime.utcnow)
+    search_text = Column(Text, nullable=True)  # normalized names, see search.py
+    dedupe_key = Column(String(32), nullable=True, index=True)  # blocking key, see duplicates.py
     
     # Relationships
     added_by_user = relationship("User", back_populates="martyrs")
 
 class Injured(Base):
     __tablename__ = "injured"
+    __table_args__ = (
+        # Listing filters: own records (by status), admin by status, newest first;
+        # each ends in (created_at, id) so a keyset cursor is a single index seek
+        Index("ix_injured_owner_status_created_id", "added_by_user_id", "status", "created_at", "id"),
+        Index("ix_injured_owner_created_id", "added_by_user_id", "created_at", "id"),
+        Index("ix_injured_status_created_id", "status", "created_at", "id"),
+        Index("ix_injured_created_id", "created_at", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     full_name = Column(String(100), nullable=False)
@@ -73,14 +94,26 @@ class Injured(Base):
     status = Column(String(20), default="pending")  # 'pending', 'approved', 'rejected'
     admin_notes = Column(Text, nullable=True)
     added_by_user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, nullable=True)
+    # Stamped when the INSERT/UPDATE executes, i.e. inside the SQLite writer queue, so a
+    # write never commits long after its timestamp (see SYNC_SETTLE in sync.py)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, nullable=True, onupdate=datetime.utcnow)
+    search_text = Column(Text, nullable=True)  # normalized names, see search.py
+    dedupe_key = Column(String(32), nullable=True, index=True)  # blocking key, see duplicates.py
     
     # Relationships
     added_by_user = relationship("User", back_populates="injured")
 
 class Prisoner(Base):
     __tablename__ = "prisoners"
+    __table_args__ = (
+        # Listing filters: own records (by status), admin by status, newest first;
+        # each ends in (created_at, id) so a keyset cursor is a single index seek
+        Index("ix_prisoners_owner_status_created_id", "added_by_user_id", "status", "created_at", "id"),
+        Index("ix_prisoners_owner_created_id", "added_by_user_id", "created_at", "id"),
+        Index("ix_prisoners_status_created_id", "status", "created_at", "id"),
+        Index("ix_prisoners_created_id", "created_at", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     full_name = Column(String(100), nullable=False)
@@ -98,8 +131,68 @@ class Prisoner(Base):
     status = Column(String(20), default="pending")  # 'pending', 'approved', 'rejected'
     admin_notes = Column(Text, nullable=True)
     added_by_user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, nullable=True)
+    # Stamped when the INSERT/UPDATE executes, i.e. inside the SQLite writer queue, so a
+    # write never commits long after its timestamp (see SYNC_SETTLE in sync.py)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, nullable=True, onupdate=datetime.utcnow)
+    search_text = Column(Text, nullable=True)  # normalized names, see search.py
+    dedupe_key = Column(String(32), nullable=True, index=True)  # blocking key, see duplicates.py
     
     # Relationships
-    added_by_user = relationship("User", back_populates="prisoners")
\ No newline at end of file
+    added_by_user = relationship("User", back_populates="prisoners")
+
+def _set_search_text(mapper, connection, target):
+    target.search_text = build_search_text(
+        target.full_name, getattr(target, "nickname", None), target.tribe
+    )
+
+def _set_dedupe_key(mapper, connection, target):
+    target.dedupe_key = blocking_key(
+        target.full_name, target.tribe,
+        getattr(target, EVENT_DATE_COLUMNS[target.__tablename__])
+    )
+
+def changed_at(model):
+    """Last write time of a record: updated_at, or created_at if never updated"""
+    return func.coalesce(model.updated_at, model.created_at)
+
+def _record_tombstone(mapper, connection, target):
+    connection.execute(insert(DeletedRecord).values(
+        record_type=target.__tablename__,
+        record_id=target.id,
+        added_by_user_id=target.added_by_user_id,
+        deleted_at=datetime.utcnow()
+    ))
+
+for _model in (Martyr, Injured, Prisoner):
+    for _hook in (_set_search_text, _set_dedupe_key):
+        event.listen(_model, "before_insert", _hook)
+        event.listen(_model, "before_update", _hook)
+    event.listen(_model, "after_delete", _record_tombstone)
+    # Delta sync walks (changed_at, id) forward from the client's position
+    Index(f"ix_{_model.__tablename__}_changed_id", changed_at(_model), _model.id)
+
+class DeletedRecord(Base):
+    __tablename__ = "deleted_records"
+    __table_args__ = (
+        Index("ix_deleted_records_deleted_id", "deleted_at", "id"),
+    )
+    
+    # Tombstones so syncing clients learn about deletions
+    id = Column(Integer, primary_key=True)
+    record_type = Column(String(20), nullable=False)  # 'martyrs', 'injured' or 'prisoners'
+    record_id = Column(Integer, nullable=False)
+    added_by_user_id = Column(Integer, nullable=False)
+    deleted_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+class UploadedFile(Base):
+    __tablename__ = "uploaded_files"
+    
+    # Content-addressed: one row (and one file on disk) per distinct content and kind
+    sha256 = Column(String(64), primary_key=True)
+    kind = Column(String(20), primary_key=True)  # 'photos' or 'documents'
+    path = Column(String(255), unique=True, index=True, nullable=False)
+    size = Column(BigInteger, nullable=False)
+    content_type = Column(String(100), nullable=True)
+    ref_count = Column(Integer, nullable=False, default=0)  # records whose photo_path/cv_file_path point here
+    created_at = Column(DateTime, default=datetime.utcnow)
@@ -0,0 +1,59 @@
+"""
+Keyset (cursor) pagination helpers for Palestine Martyrs API
+Opaque cursors keyed on (created_at, id)
+
+created_at is NOT NULL and every listing index ends in (created_at, id), so
+a page after a cursor is one index seek: `(created_at, id) < (c, i)` ordered
+`created_at DESC, id DESC` costs the same on page 1 and page 10,000.
+"""
+
+import base64
+import json
+from datetime import datetime
+from typing import Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import tuple_
+
+# Response header carrying the cursor of the next page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(created_at: datetime, record_id: int) -> str:
+    """Build an opaque cursor pointing just after the given row"""
+    payload = {"c": created_at.isoformat(), "i": record_id}
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Parse a cursor produced by encode_cursor"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return datetime.fromisoformat(payload["c"]), int(payload["i"])
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def keyset_order(query, model):
+    """Order a listing newest first with a stable tie-breaker"""
+    return query.order_by(model.created_at.desc(), model.id.desc())
+
+
+def apply_cursor(query, model, cursor: Optional[str]):
+    """Restrict a keyset-ordered query to rows after the cursor"""
+    if not cursor:
+        return query
+
+    created_at, record_id = decode_cursor(cursor)
+    # A row-value comparison the index can seek on, unlike the equivalent OR
+    return query.filter(tuple_(model.created_at, model.id) < (created_at, record_id))
+
+
+def next_cursor(rows, limit: int) -> Optional[str]:
+    """Cursor for the page after `rows`, or None on the last page"""
+    if limit <= 0 or len(rows) < limit:
+        return None
+    last = rows[-1]
+    return encode_cursor(last.created_at, last.id)
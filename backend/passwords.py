@@ -0,0 +1,62 @@
+"""
+Password hashing for Palestine Martyrs API
+bcrypt runs in a bounded worker pool so it never blocks the event loop
+"""
+
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import bcrypt
+from fastapi import HTTPException
+
+from config import get_settings
+
+settings = get_settings()
+
+# bcrypt releases the GIL while hashing, so threads scale across cores
+_workers = settings.password_hash_workers or os.cpu_count() or 1
+_executor = ThreadPoolExecutor(max_workers=_workers, thread_name_prefix="bcrypt")
+_slots = asyncio.Semaphore(_workers + settings.password_hash_max_queue)
+
+# `pending` counts jobs handed to the executor, running or waiting for a thread
+_stats = {"pending": 0, "completed": 0, "rejected": 0}
+
+
+async def _run(func, *args):
+    # Shed load instead of letting a login burst queue without bound
+    if _slots.locked():
+        _stats["rejected"] += 1
+        raise HTTPException(status_code=503, detail="Server busy, please retry")
+
+    async with _slots:
+        _stats["pending"] += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(_executor, func, *args)
+        finally:
+            _stats["pending"] -= 1
+            _stats["completed"] += 1
+
+
+async def hash_password(password: str) -> str:
+    """Hash a password off the event loop"""
+    hashed = await _run(bcrypt.hashpw, password.encode("utf-8"), bcrypt.gensalt())
+    return hashed.decode("utf-8")
+
+
+async def verify_password(password: str, hashed: str) -> bool:
+    """Check a password against its bcrypt hash off the event loop"""
+    return await _run(bcrypt.checkpw, password.encode("utf-8"), hashed.encode("utf-8"))
+
+
+def password_pool_stats() -> dict:
+    """Current load of the hashing pool"""
+    return {
+        "workers": _workers,
+        "max_queue": settings.password_hash_max_queue,
+        "in_flight": min(_stats["pending"], _workers),
+        "queue_depth": max(_stats["pending"] - _workers, 0),
+        "completed": _stats["completed"],
+        "rejected": _stats["rejected"],
+    }
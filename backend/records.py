@@ -0,0 +1,38 @@
+"""
+Record type registry for Palestine Martyrs API
+Maps the public collection names to their model and schemas
+"""
+
+from typing import NamedTuple, Type
+
+from fastapi import HTTPException
+from pydantic import BaseModel
+
+from models import Martyr, Injured, Prisoner
+from schemas import (
+    MartyrCreate, MartyrResponse,
+    InjuredCreate, InjuredResponse,
+    PrisonerCreate, PrisonerResponse,
+)
+
+
+class RecordType(NamedTuple):
+    name: str
+    model: type
+    create_schema: Type[BaseModel]
+    response_schema: Type[BaseModel]
+
+
+RECORD_TYPES = {
+    "martyrs": RecordType("martyrs", Martyr, MartyrCreate, MartyrResponse),
+    "injured": RecordType("injured", Injured, InjuredCreate, InjuredResponse),
+    "prisoners": RecordType("prisoners", Prisoner, PrisonerCreate, PrisonerResponse),
+}
+
+
+def get_record_type(name: str) -> RecordType:
+    """Look up a record type by its URL name, 404 if unknown"""
+    record_type = RECORD_TYPES.get(name)
+    if record_type is None:
+        raise HTTPException(status_code=404, detail=f"Unknown record type: {name}")
+    return record_type
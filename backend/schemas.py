@@ -3,9 +3,11 @@ Pydantic Schemas for Palestine Martyrs API
 Data validation and serialization schemas
 """
 
-from pydantic import BaseModel, EmailStr, validator
+from pydantic import BaseModel, EmailStr, validator, computed_field
 from datetime import datetime
-from typing import Optional, List
+from typing import Optional, List, Dict
+
+from images import thumbnail_paths
 
 # ===== USER SCHEMAS =====
 
@@ -42,6 +44,19 @@ class UserResponse(UserBase):
     class Config:
         from_attributes = True
 
+# ===== PHOTO VARIANTS =====
+
+class PhotoThumbnailsMixin(BaseModel):
+    @computed_field
+    @property
+    def photo_thumbnails(self) -> Optional[Dict[str, str]]:
+        """WebP variants of photo_path keyed by size in px"""
+        return thumbnail_paths(self.photo_path)
+
+class DuplicateCandidatesMixin(BaseModel):
+    # Filled on create only: ids of records with the same name, tribe and date
+    possible_duplicates: Optional[List[int]] = None
+
 # ===== MARTYR SCHEMAS =====
 
 class MartyrBase(BaseModel):
@@ -79,7 +94,7 @@ class MartyrUpdate(BaseModel):
     photo_path: Optional[str] = None
     cv_file_path: Optional[str] = None
 
-class MartyrResponse(MartyrBase):
+class MartyrResponse(MartyrBase, PhotoThumbnailsMixin, DuplicateCandidatesMixin):
     id: int
     status: str
     admin_notes: Optional[str] = None
@@ -123,7 +138,7 @@ class InjuredUpdate(BaseModel):
     photo_path: Optional[str] = None
     cv_file_path: Optional[str] = None
 
-class InjuredResponse(InjuredBase):
+class InjuredResponse(InjuredBase, PhotoThumbnailsMixin, DuplicateCandidatesMixin):
     id: int
     status: str
     admin_notes: Optional[str] = None
@@ -167,7 +182,7 @@ class PrisonerUpdate(BaseModel):
     photo_path: Optional[str] = None
     cv_file_path: Optional[str] = None
 
-class PrisonerResponse(PrisonerBase):
+class PrisonerResponse(PrisonerBase, PhotoThumbnailsMixin, DuplicateCandidatesMixin):
     id: int
     status: str
     admin_notes: Optional[str] = None
@@ -190,6 +205,32 @@ class StatusUpdate(BaseModel):
             raise ValueError('status must be pending, approved, or rejected')
         return v
 
+class BatchStatusUpdate(StatusUpdate):
+    martyr_ids: List[int] = []
+    injured_ids: List[int] = []
+    prisoner_ids: List[int] = []
+
+class BatchStatusResponse(BaseModel):
+    status: str
+    updated: Dict[str, int]
+    not_found: Dict[str, List[int]]
+
+class SearchResult(BaseModel):
+    record_type: str
+    id: int
+    full_name: str
+    tribe: Optional[str] = None
+    status: str
+    score: float
+
+class SyncResponse(BaseModel):
+    martyrs: List[MartyrResponse]
+    injured: List[InjuredResponse]
+    prisoners: List[PrisonerResponse]
+    deleted: Dict[str, List[int]]
+    has_more: bool
+    next_since: str
+
 class StatsResponse(BaseModel):
     total_martyrs: int
     total_injured: int
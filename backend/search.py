@@ -0,0 +1,159 @@
+"""
+Name search for Palestine Martyrs API
+Ranked, Arabic-normalized search over full_name / nickname / tribe
+
+PostgreSQL: pg_trgm GIN index on search_text, ranked by word_similarity
+SQLite:     one FTS5 trigram table per record type, kept in sync by triggers
+"""
+
+from typing import List, Optional
+
+from sqlalchemy import column, func, literal, literal_column, or_, select, table, text, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from arabic import build_search_text, normalize_arabic
+from records import RECORD_TYPES
+
+# FTS5's trigram tokenizer cannot match anything shorter than this
+MIN_TRIGRAM_LENGTH = 3
+
+
+def _fts_table(name: str) -> str:
+    return f"{name}_fts"
+
+
+def _postgres_ddl() -> List[str]:
+    statements = ["CREATE EXTENSION IF NOT EXISTS pg_trgm"]
+    for name in RECORD_TYPES:
+        statements.append(
+            f"CREATE INDEX IF NOT EXISTS ix_{name}_search_trgm "
+            f"ON {name} USING gin (search_text gin_trgm_ops)"
+        )
+    return statements
+
+
+def _sqlite_ddl(conn) -> List[str]:
+    statements = []
+    for name in RECORD_TYPES:
+        fts = _fts_table(name)
+        exists = conn.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {"name": fts},
+        ).first()
+        if exists:
+            continue
+        statements += [
+            f"CREATE VIRTUAL TABLE {fts} USING fts5(search_text, tokenize = 'trigram')",
+            # rowid mirrors the record id, so sync and joins are primary-key lookups
+            f"INSERT INTO {fts} (rowid, search_text) SELECT id, search_text FROM {name} "
+            f"WHERE search_text IS NOT NULL",
+            f"CREATE TRIGGER IF NOT EXISTS {name}_fts_insert AFTER INSERT ON {name} BEGIN "
+            f"INSERT INTO {fts} (rowid, search_text) VALUES (new.id, new.search_text); END",
+            f"CREATE TRIGGER IF NOT EXISTS {name}_fts_update AFTER UPDATE OF search_text ON {name} BEGIN "
+            f"DELETE FROM {fts} WHERE rowid = old.id; "
+            f"INSERT INTO {fts} (rowid, search_text) VALUES (new.id, new.search_text); END",
+            f"CREATE TRIGGER IF NOT EXISTS {name}_fts_delete AFTER DELETE ON {name} BEGIN "
+            f"DELETE FROM {fts} WHERE rowid = old.id; END",
+        ]
+    return statements
+
+
+def backfill_search_text(conn, batch_size: int = 1000) -> None:
+    """Fill search_text for rows written before the column existed"""
+    for name, record_type in RECORD_TYPES.items():
+        table = record_type.model.__table__
+        has_nickname = "nickname" in table.c
+        while True:
+            rows = conn.execute(
+                select(table.c.id, table.c.full_name, table.c.tribe,
+                       table.c.nickname if has_nickname else literal(None))
+                .where(table.c.search_text.is_(None))
+                .limit(batch_size)
+            ).all()
+            if not rows:
+                break
+            for row in rows:
+                conn.execute(
+                    table.update().where(table.c.id == row[0])
+                    .values(search_text=build_search_text(row[1], row[3], row[2]))
+                )
+
+
+def ensure_search_index(conn) -> None:
+    """Create the search index for the connection's dialect (idempotent)"""
+    dialect = conn.dialect.name
+    if dialect == "postgresql":
+        statements = _postgres_ddl()
+    elif dialect == "sqlite":
+        statements = _sqlite_ddl(conn)
+    else:
+        return
+    for statement in statements:
+        conn.execute(text(statement))
+
+
+def _visible(model, user_id: Optional[int]):
+    return [] if user_id is None else [model.added_by_user_id == user_id]
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _postgres_query(query: str, names: List[str], user_id: Optional[int]):
+    parts = []
+    for name in names:
+        model = RECORD_TYPES[name].model
+        score = func.word_similarity(query, model.search_text)
+        parts.append(
+            select(
+                literal(name).label("record_type"), model.id, model.full_name,
+                model.tribe, model.status, score.label("score"),
+            ).where(
+                or_(
+                    literal(query).op("<%")(model.search_text),
+                    model.search_text.ilike(f"%{_escape_like(query)}%", escape="\\"),
+                ),
+                *_visible(model, user_id),
+            )
+        )
+    return parts
+
+
+def _sqlite_query(query: str, names: List[str], user_id: Optional[int]):
+    parts = []
+    for name in names:
+        model = RECORD_TYPES[name].model
+        fts = table(_fts_table(name), column("rowid"))
+        columns = (
+            literal(name).label("record_type"), model.id, model.full_name,
+            model.tribe, model.status,
+        )
+        if len(query) >= MIN_TRIGRAM_LENGTH:
+            phrase = '"' + query.replace('"', '""') + '"'
+            parts.append(
+                select(*columns, (-func.bm25(literal_column(fts.name))).label("score"))
+                .select_from(fts)
+                .join(model, model.id == fts.c.rowid)
+                .where(literal_column(fts.name).op("MATCH")(phrase), *_visible(model, user_id))
+            )
+        else:
+            parts.append(
+                select(*columns, literal(0.0).label("score"))
+                .where(model.search_text.like(f"%{_escape_like(query)}%", escape="\\"),
+                       *_visible(model, user_id))
+            )
+    return parts
+
+
+async def search_records(db: AsyncSession, query: str, names: List[str],
+                         user_id: Optional[int], limit: int) -> List[dict]:
+    """Best matches across record types; user_id limits results to that user's records"""
+    normalized = normalize_arabic(query)
+    if not normalized:
+        return []
+    builder = _postgres_query if db.bind.dialect.name == "postgresql" else _sqlite_query
+    statement = union_all(*builder(normalized, names, user_id))
+    statement = select(statement.subquery()).order_by(text("score DESC")).limit(limit)
+    result = await db.execute(statement)
+    return [dict(row._mapping) for row in result]
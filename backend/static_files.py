@@ -0,0 +1,222 @@
+"""
+Static file serving for Palestine Martyrs API
+Uploads with strong ETags, Range requests and long-lived cache headers,
+plus admin panel assets held in memory precompressed with gzip/brotli
+
+Uploads share the admin panel's origin, so only the accepted image and
+document types are served, never sniffed, and documents only as downloads.
+"""
+
+import hashlib
+import os
+import re
+import stat
+from email.utils import formatdate
+from mimetypes import guess_type
+from typing import Dict, NamedTuple, Optional, Tuple
+
+import anyio
+from fastapi import HTTPException, Request
+from starlette.responses import FileResponse, Response, StreamingResponse
+
+from compression import available_encodings, compress, negotiate
+from conditional import etag_matches
+from config import get_settings
+from uploads import upload_dir
+
+settings = get_settings()
+
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE = "public, max-age=0, must-revalidate"
+CHUNK_SIZE = 64 * 1024
+
+# <sha256>.<ext> originals and <sha256>_<size>.webp variants never change content
+_CONTENT_ADDRESSED = re.compile(r"^(?P<sha>[0-9a-f]{64})(?:_(?P<size>\d+))?\.[a-z0-9]+$")
+_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+ENCODING_ETAG_SUFFIXES = {"identity": "", "gzip": "-gz", "br": "-br"}
+
+
+class Asset(NamedTuple):
+    mtime: float
+    digest: str  # of the identity body
+    bodies: Dict[str, bytes]  # encoding ("identity", "gzip", "br") -> body
+
+    def etag(self, encoding: str) -> str:
+        """Strong ETag of one encoded body; each encoding is a different byte sequence"""
+        suffix = ENCODING_ETAG_SUFFIXES[encoding]
+        return f'"{self.digest}{suffix}"'
+
+
+_assets: Dict[str, Asset] = {}
+
+
+def load_asset(path: str) -> Asset:
+    """File contents plus max-level gzip/brotli variants, rebuilt only when the mtime changes"""
+    mtime = os.stat(path).st_mtime
+    cached = _assets.get(path)
+    if cached is not None and cached.mtime == mtime:
+        return cached
+    with open(path, "rb") as f:
+        content = f.read()
+    bodies = {"identity": content}
+    for encoding in available_encodings():
+        bodies[encoding] = compress(content, encoding)
+    asset = Asset(mtime, hashlib.sha256(content).hexdigest()[:32], bodies)
+    _assets[path] = asset
+    return asset
+
+
+def serve_asset(request: Request, path: str, media_type: str) -> Response:
+    """Precompressed admin asset; per request only a dictionary lookup"""
+    asset = load_asset(path)
+    encodings = [name for name in asset.bodies if name != "identity"]
+    encoding = negotiate(request.headers.get("accept-encoding", ""), encodings) or "identity"
+    etag = asset.etag(encoding)
+    headers = {"ETag": etag, "Cache-Control": REVALIDATE_CACHE, "Vary": "Accept-Encoding"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    return Response(asset.bodies[encoding], headers=headers, media_type=media_type)
+
+
+def upload_media_type(full_path: str) -> str:
+    """Content type an upload is served with; 404 for anything not accepted on upload"""
+    media_type = guess_type(full_path)[0]
+    if media_type in settings.allowed_image_types or media_type == "image/webp":
+        return media_type
+    if media_type in settings.allowed_document_types:
+        return media_type
+    raise HTTPException(status_code=404, detail="File not found")
+
+
+def upload_headers(media_type: str) -> Dict[str, str]:
+    """Headers that keep a stored file from being rendered as active content"""
+    headers = {"X-Content-Type-Options": "nosniff"}
+    if not media_type.startswith("image/"):
+        headers["Content-Disposition"] = "attachment"
+    return headers
+
+
+def resolve_upload(relative_path: str) -> str:
+    """Map a request path under /uploads to a file inside the upload directory"""
+    root = os.path.realpath(upload_dir(""))
+    full_path = os.path.realpath(os.path.join(root, relative_path))
+    if os.path.commonpath([root, full_path]) != root:
+        raise HTTPException(status_code=404, detail="File not found")
+    return full_path
+
+
+def _etag_for(filename: str, stat_result: os.stat_result) -> Tuple[str, bool]:
+    """(etag, immutable) — strong content-hash tags for content-addressed files"""
+    match = _CONTENT_ADDRESSED.match(filename)
+    if match:
+        suffix = f"-{match.group('size')}" if match.group("size") else ""
+        return f'"{match.group("sha")}{suffix}"', True
+    return f'"{int(stat_result.st_mtime)}-{stat_result.st_size}"', False
+
+
+def _parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """Single byte range as inclusive (start, end); None means serve the whole file"""
+    match = _RANGE.match(header.strip())
+    if not match or (not match.group(1) and not match.group(2)):
+        return None  # multi-range or malformed: ignore and send 200
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    else:
+        start = max(size - int(last), 0)
+        end = size - 1
+    if start >= size or start > end:
+        raise HTTPException(
+            status_code=416,
+            detail="Requested range not satisfiable",
+            headers={"Content-Range": f"bytes */{size}"},
+        )
+    return start, end
+
+
+async def _read_range(path: str, start: int, end: int):
+    async with await anyio.open_file(path, "rb") as file:
+        await file.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = await file.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+async def serve_upload(request: Request, relative_path: str) -> Response:
+    """Conditional, range-aware response for a stored upload"""
+    full_path = resolve_upload(relative_path)
+    media_type = upload_media_type(full_path)
+    try:
+        stat_result = await anyio.to_thread.run_sync(os.stat, full_path)
+    except (FileNotFoundError, NotADirectoryError):
+        return await _variant_fallback(request, full_path)
+    if not stat.S_ISREG(stat_result.st_mode):
+        raise HTTPException(status_code=404, detail="File not found")
+
+    etag, immutable = _etag_for(os.path.basename(full_path), stat_result)
+    headers = {
+        **upload_headers(media_type),
+        "ETag": etag,
+        "Cache-Control": IMMUTABLE_CACHE if immutable else REVALIDATE_CACHE,
+        "Accept-Ranges": "bytes",
+        "Last-Modified": formatdate(stat_result.st_mtime, usegmt=True),
+    }
+
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    if settings.upload_accel_redirect_prefix:
+        # Let the front proxy (nginx) do zero-copy sendfile and Range handling
+        relative = os.path.relpath(full_path, os.path.realpath(upload_dir("")))
+        headers["X-Accel-Redirect"] = settings.upload_accel_redirect_prefix.rstrip("/") + "/" + relative
+        return Response(headers=headers, media_type=media_type)
+
+    size = stat_result.st_size
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (not if_range or if_range.strip() == etag):
+        byte_range = _parse_range(range_header, size)
+        if byte_range is not None:
+            start, end = byte_range
+            headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+            headers["Content-Length"] = str(end - start + 1)
+            return StreamingResponse(
+                _read_range(full_path, start, end),
+                status_code=206,
+                headers=headers,
+                media_type=media_type,
+            )
+
+    return FileResponse(full_path, headers=headers, media_type=media_type,
+                        stat_result=stat_result, method=request.method)
+
+
+async def _variant_fallback(request: Request, full_path: str) -> Response:
+    """A thumbnail still being generated: serve the original, uncached"""
+    match = _CONTENT_ADDRESSED.match(os.path.basename(full_path))
+    if match and match.group("size"):
+        directory = os.path.dirname(full_path)
+        prefix = match.group("sha") + "."
+        try:
+            names = await anyio.to_thread.run_sync(os.listdir, directory)
+        except (FileNotFoundError, NotADirectoryError):
+            names = []
+        for name in names:
+            if name.startswith(prefix) and not name.endswith(".part"):
+                original = os.path.join(directory, name)
+                media_type = upload_media_type(original)
+                return FileResponse(
+                    original,
+                    headers={**upload_headers(media_type), "Cache-Control": "no-cache"},
+                    media_type=media_type,
+                    method=request.method,
+                )
+    raise HTTPException(status_code=404, detail="File not found")
@@ -0,0 +1,134 @@
+"""
+Delta sync for Palestine Martyrs API
+Records changed since the client's last sync, plus tombstones for deletions
+
+The client keeps an opaque token holding, per record type, the (changed_at, id)
+position it has seen up to. Each call returns what changed after those
+positions, so cost tracks the number of changes rather than the table sizes.
+"""
+
+import base64
+import json
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import and_, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import DeletedRecord, changed_at
+from records import RECORD_TYPES
+
+# Writes stamped just before a sync may commit just after it; positions stay
+# this far behind the clock so those rows are picked up (again) next time.
+# Rows are stamped as their INSERT/UPDATE executes, after any wait for the
+# SQLite writer queue, so the gap is the rest of one transaction: a single
+# record, one import batch or one batch status update.
+SYNC_SETTLE = timedelta(seconds=5)
+
+DELETED = "deleted"
+
+Position = Tuple[datetime, int]
+
+
+def encode_token(positions: Dict[str, Position]) -> str:
+    payload = {name: [at.isoformat(), record_id] for name, (at, record_id) in positions.items()}
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _parse_time(value: str) -> datetime:
+    """ISO timestamp as naive UTC, the way the columns store it ('Z' / offsets converted)"""
+    # fromisoformat only accepts a trailing 'Z' from Python 3.11
+    at = datetime.fromisoformat(value[:-1] + "+00:00" if value.endswith("Z") else value)
+    if at.tzinfo is not None:
+        at = at.astimezone(timezone.utc).replace(tzinfo=None)
+    return at
+
+
+def decode_since(since: Optional[str]) -> Dict[str, Position]:
+    """Positions from a sync token, or one ISO timestamp applied to every type"""
+    if not since:
+        return {}
+    try:
+        at = _parse_time(since)
+        return {name: (at, 0) for name in (*RECORD_TYPES, DELETED)}
+    except ValueError:
+        pass
+    try:
+        padded = since + "=" * (-len(since) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return {
+            name: (_parse_time(at), int(record_id))
+            for name, (at, record_id) in payload.items()
+            if name in RECORD_TYPES or name == DELETED
+        }
+    except (ValueError, TypeError, AttributeError):
+        raise HTTPException(status_code=400, detail="Invalid sync token")
+
+
+def _after(expression, id_column, position: Optional[Position]):
+    if position is None:
+        return []
+    at, record_id = position
+    return [or_(expression > at, and_(expression == at, id_column > record_id))]
+
+
+def _advance(position: Optional[Position], rows_position: Optional[Position],
+             truncated: bool, settled: Position) -> Optional[Position]:
+    """Next position: the last row sent on a partial page, else the settle point"""
+    if truncated:
+        return rows_position
+    if position is None or position < settled:
+        return settled
+    return position
+
+
+async def collect_changes(db: AsyncSession, since: Optional[str], user_id: Optional[int],
+                          limit: int) -> dict:
+    """Changed records and tombstones after `since`; user_id limits them to that user's"""
+    positions = decode_since(since)
+    settled = (datetime.utcnow() - SYNC_SETTLE, 0)
+    payload = {}
+    next_positions = {}
+    has_more = False
+
+    for name, record_type in RECORD_TYPES.items():
+        model = record_type.model
+        expression = changed_at(model)
+        query = select(model).where(*_after(expression, model.id, positions.get(name)))
+        if user_id is not None:
+            query = query.where(model.added_by_user_id == user_id)
+        rows = (await db.scalars(query.order_by(expression, model.id).limit(limit + 1))).all()
+
+        truncated = len(rows) > limit
+        rows = rows[:limit]
+        last = (rows[-1].updated_at or rows[-1].created_at, rows[-1].id) if rows else None
+        next_positions[name] = _advance(positions.get(name), last, truncated, settled)
+        payload[name] = [record_type.response_schema.from_orm(row) for row in rows]
+        has_more = has_more or truncated
+
+    query = select(DeletedRecord).where(
+        *_after(DeletedRecord.deleted_at, DeletedRecord.id, positions.get(DELETED))
+    )
+    if user_id is not None:
+        query = query.where(DeletedRecord.added_by_user_id == user_id)
+    tombstones = (await db.scalars(
+        query.order_by(DeletedRecord.deleted_at, DeletedRecord.id).limit(limit + 1)
+    )).all()
+    truncated = len(tombstones) > limit
+    tombstones = tombstones[:limit]
+    last = (tombstones[-1].deleted_at, tombstones[-1].id) if tombstones else None
+    next_positions[DELETED] = _advance(positions.get(DELETED), last, truncated, settled)
+    has_more = has_more or truncated
+
+    deleted = {name: [] for name in RECORD_TYPES}
+    for tombstone in tombstones:
+        deleted[tombstone.record_type].append(tombstone.record_id)
+
+    return dict(
+        payload,
+        deleted=deleted,
+        has_more=has_more,
+        next_since=encode_token(next_positions),
+    )
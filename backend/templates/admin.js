@@ -7,6 +7,8 @@
 const API_BASE_URL = window.location.origin; // Use same origin as the admin panel
 let authToken = localStorage.getItem('adminToken');
 let currentUser = null;
+let moderationSocket = null;
+let moderationRetryDelay = 1000;
 
 // Initialize the application
 document.addEventListener('DOMContentLoaded', function() {
@@ -56,6 +58,7 @@ async function handleLogin(e) {
         
         showMainDashboard();
         loadInitialData();
+        connectModerationFeed();
         
     } catch (error) {
         showError('loginError', error.message);
@@ -82,6 +85,7 @@ async function verifyToken() {
         
         showMainDashboard();
         loadInitialData();
+        connectModerationFeed();
         
     } catch (error) {
         logout();
@@ -91,10 +95,52 @@ async function verifyToken() {
 function logout() {
     authToken = null;
     currentUser = null;
+    if (moderationSocket) {
+        moderationSocket.close();
+        moderationSocket = null;
+    }
     localStorage.removeItem('adminToken');
     showLoginPage();
 }
 
+// Live moderation feed: refresh only what an event touched instead of polling
+function connectModerationFeed() {
+    if (!authToken || moderationSocket) {
+        return;
+    }
+    
+    // The token goes in the first message, never in the URL (URLs end up in access logs)
+    const wsUrl = API_BASE_URL.replace(/^http/, 'ws') + '/ws/moderation';
+    const socket = new WebSocket(wsUrl);
+    moderationSocket = socket;
+    
+    socket.onopen = function() {
+        socket.send(JSON.stringify({ token: authToken }));
+        moderationRetryDelay = 1000;
+    };
+    
+    socket.onmessage = function(message) {
+        const event = JSON.parse(message.data);
+        loadStatistics();
+        
+        const activeTab = document.querySelector('#mainTabs .nav-link.active');
+        if (activeTab && activeTab.getAttribute('href') === `#${event.record_type}`) {
+            loadTabData(event.record_type);
+        }
+    };
+    
+    socket.onclose = function() {
+        if (moderationSocket !== socket) {
+            return;
+        }
+        moderationSocket = null;
+        if (authToken) {
+            setTimeout(connectModerationFeed, moderationRetryDelay);
+            moderationRetryDelay = Math.min(moderationRetryDelay * 2, 30000);
+        }
+    };
+}
+
 // UI Functions
 function showLoginPage() {
     document.getElementById('loginPage').style.display = 'flex';
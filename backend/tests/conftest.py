@@ -0,0 +1,108 @@
+"""
+Shared fixtures for the Palestine Martyrs API tests
+Runs the app against a throwaway SQLite database and upload directory
+
+Usage (from backend/):
+    python -m pytest -q tests
+"""
+
+import io
+import os
+import sys
+import tempfile
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+from PIL import Image
+
+BACKEND = Path(__file__).resolve().parent.parent
+_workdir = tempfile.mkdtemp(prefix="palestine-martyrs-tests-")
+
+# Before anything imports config: development mode pins ./palestine_martyrs.db
+os.environ.update(
+    ENVIRONMENT="test",
+    DATABASE_URL=f"sqlite:///{_workdir}/test.db",
+    UPLOAD_PATH=f"{_workdir}/uploads",
+)
+os.chdir(BACKEND)  # templates/ is resolved relative to the working directory
+sys.path.insert(0, str(BACKEND))
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from database import engine  # noqa: E402
+from main import app  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture(scope="session")
+def admin_headers(client):
+    response = client.post("/auth/login", json={"username": "admin", "password": "admin123"})
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+@pytest.fixture
+def regular_user(client):
+    """(user id, auth headers) of a fresh regular user, so tests see only their own records"""
+    username = f"user-{uuid.uuid4().hex[:12]}"
+    user = client.post("/auth/register", json={
+        "username": username, "password": "secret1", "full_name": "Test User", "user_type": "regular",
+    })
+    assert user.status_code == 200, user.text
+    response = client.post("/auth/login", json={"username": username, "password": "secret1"})
+    return user.json()["id"], {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+@pytest.fixture
+def db_engine(client):
+    """The sync engine, after startup has created the tables"""
+    return engine
+
+
+def seed_martyrs(conn, count, status="pending", created_at=None, step=timedelta(seconds=1), user_id=1):
+    """Insert `count` martyrs, added by the default admin unless `user_id` is given"""
+    from models import Martyr
+
+    base = created_at or datetime(2024, 1, 1)
+    conn.execute(Martyr.__table__.insert(), [
+        {
+            "full_name": f"seed {i}", "tribe": "t", "death_date": base,
+            "death_place": "p", "cause_of_death": "c", "contact_family": "f",
+            "status": status, "added_by_user_id": user_id,
+            "created_at": base + step * i,
+        }
+        for i in range(count)
+    ])
+
+
+def martyr_payload(**values):
+    """A valid POST /martyrs body; keyword arguments override its fields"""
+    return {
+        "full_name": "test martyr", "tribe": "t", "death_date": "2024-01-01T00:00:00",
+        "death_place": "p", "cause_of_death": "c", "contact_family": "f",
+        **values,
+    }
+
+
+def import_file(client, headers, record_type, name, content, **params):
+    """POST /admin/import/<record_type> with a single file"""
+    return client.post(f"/admin/import/{record_type}", params=params,
+                       files={"file": (name, content, "application/octet-stream")}, headers=headers)
+
+
+def png_bytes(color):
+    buffer = io.BytesIO()
+    Image.new("RGB", (4, 4), color).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def upload(client, headers, kind, name, content, content_type):
+    """POST /upload/<kind> with a single file"""
+    return client.post(f"/upload/{kind}", files={"file": (name, content, content_type)}, headers=headers)
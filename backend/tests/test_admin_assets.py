@@ -0,0 +1,31 @@
+"""Precompressed admin assets: one strong ETag per encoding"""
+
+import pytest
+
+from compression import available_encodings
+
+SUFFIXES = {"gzip": "-gz", "br": "-br"}
+
+
+def test_each_encoding_has_its_own_etag(client):
+    identity = client.get("/admin.js", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in identity.headers
+    base = identity.headers["etag"]
+
+    for encoding in available_encodings():
+        encoded = client.get("/admin.js", headers={"Accept-Encoding": encoding})
+        assert encoded.headers["content-encoding"] == encoding
+        assert encoded.headers["etag"] == base[:-1] + SUFFIXES[encoding] + '"'
+
+
+@pytest.mark.parametrize("encoding", ["identity", *available_encodings()])
+def test_revalidation_matches_only_the_same_encoding(client, encoding):
+    first = client.get("/admin.js", headers={"Accept-Encoding": encoding})
+    etag = first.headers["etag"]
+
+    again = client.get("/admin.js", headers={"Accept-Encoding": encoding, "If-None-Match": etag})
+    assert again.status_code == 304
+
+    other = "gzip" if encoding != "gzip" else "identity"
+    switched = client.get("/admin.js", headers={"Accept-Encoding": other, "If-None-Match": etag})
+    assert switched.status_code == 200
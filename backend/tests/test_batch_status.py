@@ -0,0 +1,64 @@
+"""Batch moderation: one UPDATE per chunk, with or without RETURNING"""
+
+from sqlalchemy import select
+
+import main
+from conftest import seed_martyrs
+from database import async_engine
+from models import Martyr
+
+
+def seeded_ids(db_engine, count, status):
+    with db_engine.begin() as conn:
+        seed_martyrs(conn, count, status=status)
+        return conn.execute(select(Martyr.id).where(Martyr.status == status).order_by(Martyr.id)).scalars().all()
+
+
+def statuses(db_engine, ids):
+    with db_engine.connect() as conn:
+        rows = conn.execute(select(Martyr.id, Martyr.status, Martyr.admin_notes, Martyr.updated_at)
+                            .where(Martyr.id.in_(ids))).all()
+    return {row.id: row for row in rows}
+
+
+def batch(client, headers, **body):
+    return client.put("/admin/status/batch", json={"status": "approved", **body}, headers=headers)
+
+
+def test_returning_reports_missing_ids(client, admin_headers, db_engine, monkeypatch):
+    monkeypatch.setattr(main, "BATCH_STATUS_CHUNK", 2)  # several chunks per table
+    ids = seeded_ids(db_engine, 5, "batch-returning")
+    missing = [max(ids) + 100_000, max(ids) + 100_001]
+
+    response = batch(client, admin_headers, martyr_ids=ids + missing + ids[:1],
+                     injured_ids=[999_999], admin_notes="checked")
+    assert response.status_code == 200, response.text
+    assert response.json() == {
+        "status": "approved",
+        "updated": {"martyrs": 5, "injured": 0, "prisoners": 0},
+        "not_found": {"martyrs": missing, "injured": [999_999], "prisoners": []},
+    }
+    rows = statuses(db_engine, ids)
+    assert all(row.status == "approved" and row.admin_notes == "checked" for row in rows.values())
+    assert all(row.updated_at is not None for row in rows.values())
+
+
+def test_rowcount_path_without_returning(client, admin_headers, db_engine, monkeypatch):
+    # Databases without UPDATE ... RETURNING only report how many rows changed
+    monkeypatch.setattr(async_engine.dialect, "update_returning", False)
+    ids = seeded_ids(db_engine, 3, "batch-rowcount")
+
+    response = batch(client, admin_headers, martyr_ids=ids + [max(ids) + 100_000], status="rejected")
+    assert response.status_code == 200, response.text
+    assert response.json()["updated"]["martyrs"] == 3
+    assert response.json()["not_found"]["martyrs"] == []
+    assert {row.status for row in statuses(db_engine, ids).values()} == {"rejected"}
+
+
+def test_unknown_status_is_rejected(client, admin_headers):
+    assert batch(client, admin_headers, status="archived", martyr_ids=[1]).status_code == 422
+
+
+def test_regular_users_cannot_moderate(client, regular_user):
+    _, headers = regular_user
+    assert batch(client, headers, martyr_ids=[1]).status_code == 403
@@ -0,0 +1,109 @@
+"""Bulk import: per-row reports, batch fallback to single rows, derived columns"""
+
+import json
+
+import pytest
+from sqlalchemy import select, text
+
+from conftest import import_file, png_bytes, upload
+from models import Martyr, UploadedFile
+from uploads import storage_path
+
+
+def ndjson(*rows):
+    return "\n".join(row if isinstance(row, str) else json.dumps(row) for row in rows).encode("utf-8")
+
+
+def row(name, **values):
+    return {
+        "full_name": name, "tribe": "t", "death_date": "2024-02-01T00:00:00",
+        "death_place": "p", "cause_of_death": "c", "contact_family": "f",
+        **values,
+    }
+
+
+def names(db_engine, *full_names):
+    with db_engine.connect() as conn:
+        return conn.execute(
+            select(Martyr.full_name, Martyr.status).where(Martyr.full_name.in_(full_names))
+        ).all()
+
+
+def test_invalid_rows_are_reported_and_the_rest_inserted(client, admin_headers, db_engine):
+    content = ndjson(
+        row("import ok 1"),
+        "{not json",
+        {"full_name": "import missing fields"},
+        "[1, 2]",
+        row("import ok 2"),
+    )
+    response = import_file(client, admin_headers, "martyrs", "rows.ndjson", content, status="approved")
+    assert response.status_code == 200, response.text
+    report = response.json()
+
+    assert (report["inserted"], report["failed"]) == (2, 3)
+    assert [error["line"] for error in report["errors"]] == [2, 3, 4]
+    assert "expected a JSON object" in report["errors"][2]["errors"]
+    assert sorted(names(db_engine, "import ok 1", "import ok 2")) == [
+        ("import ok 1", "approved"), ("import ok 2", "approved"),
+    ]
+
+
+def test_csv_empty_cells_mean_not_provided(client, admin_headers, db_engine):
+    content = (
+        "full_name,nickname,tribe,death_date,death_place,cause_of_death,contact_family,num_children\n"
+        "csv import,,t,2024-02-01T00:00:00,p,c,f,\n"
+    ).encode("utf-8")
+    response = import_file(client, admin_headers, "martyrs", "rows.csv", content)
+    assert response.json()["inserted"] == 1
+    with db_engine.connect() as conn:
+        imported = conn.execute(select(Martyr).where(Martyr.full_name == "csv import")).one()
+    assert imported.nickname is None and imported.num_children is None
+    assert imported.status == "pending" and imported.search_text == "csv import t"
+
+
+@pytest.fixture
+def rejecting_trigger(db_engine):
+    """A database-level rejection of one row, the kind schema validation cannot catch"""
+    with db_engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TRIGGER test_reject_import BEFORE INSERT ON martyrs "
+            "WHEN new.full_name = 'rejected by db' "
+            "BEGIN SELECT RAISE(ABORT, 'row rejected by trigger'); END"
+        ))
+    yield
+    with db_engine.begin() as conn:
+        conn.execute(text("DROP TRIGGER test_reject_import"))
+
+
+def test_failed_batch_falls_back_to_single_rows(client, admin_headers, db_engine, rejecting_trigger):
+    content = ndjson(row("fallback 1"), row("rejected by db"), row("fallback 2"), row("fallback 3"))
+    response = import_file(client, admin_headers, "martyrs", "rows.ndjson", content, batch_size=10)
+    report = response.json()
+
+    assert (report["inserted"], report["failed"]) == (3, 1)
+    assert report["errors"] == [{"line": 2, "errors": ["database: row rejected by trigger"]}]
+    assert len(names(db_engine, "fallback 1", "fallback 2", "fallback 3")) == 3
+    assert names(db_engine, "rejected by db") == []
+
+
+def test_imported_file_references_are_counted(client, admin_headers, db_engine):
+    photo = upload(client, admin_headers, "photo", "i.png", png_bytes("purple"), "image/png").json()
+    content = ndjson(row("with photo 1", photo_path=photo["file_path"]),
+                     row("with photo 2", photo_path=photo["file_path"]))
+    assert import_file(client, admin_headers, "martyrs", "rows.ndjson", content).json()["inserted"] == 2
+
+    with db_engine.connect() as conn:
+        ref_count = conn.execute(
+            select(UploadedFile.ref_count).where(UploadedFile.path == storage_path(photo["file_path"]))
+        ).scalar()
+    assert ref_count == 2
+
+
+def test_bad_requests_are_rejected(client, admin_headers, regular_user):
+    _, headers = regular_user
+    content = ndjson(row("never imported"))
+    assert import_file(client, headers, "martyrs", "rows.ndjson", content).status_code == 403
+    assert import_file(client, admin_headers, "martyrs", "rows.txt", content).status_code == 400
+    assert import_file(client, admin_headers, "martyrs", "rows.ndjson", content, status="deleted").status_code == 400
+    assert import_file(client, admin_headers, "soldiers", "rows.ndjson", content).status_code == 404
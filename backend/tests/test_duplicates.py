@@ -0,0 +1,50 @@
+"""Duplicate candidates: one blocking key for API-created and imported records"""
+
+import json
+
+from conftest import import_file, martyr_payload
+
+
+def create(client, headers, **values):
+    response = client.post("/martyrs", json=martyr_payload(**values), headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def imported_id(client, headers, **values):
+    content = json.dumps(martyr_payload(**values)).encode("utf-8")
+    report = import_file(client, headers, "martyrs", "rows.ndjson", content).json()
+    assert report["inserted"] == 1, report
+    listing = client.get("/martyrs", params={"limit": 1}, headers=headers).json()
+    return listing[0]["id"]
+
+
+def test_imported_and_api_records_share_blocking_keys(client, admin_headers):
+    first = imported_id(client, admin_headers, full_name="مُحَمَّد فتحي حمدونة", tribe="آل حمدونة",
+                        death_date="2023-11-05T08:00:00")
+    # Same person typed differently, at another time of the same day
+    second = create(client, admin_headers, full_name="محمد فتحي حمدونه", tribe="ال حمدونة",
+                    death_date="2023-11-05T21:30:00")
+    assert second["possible_duplicates"] == [first]
+
+    response = client.get(f"/admin/duplicates/martyrs/{first}", headers=admin_headers)
+    assert response.status_code == 200
+    assert [record["id"] for record in response.json()] == [second["id"]]
+
+
+def test_other_days_tribes_and_rejected_records_are_not_candidates(client, admin_headers):
+    base = {"full_name": "سامر دويكات", "tribe": "دويكات", "death_date": "2023-12-01T00:00:00"}
+    original = create(client, admin_headers, **base)
+    assert original["possible_duplicates"] == []
+
+    assert create(client, admin_headers, **{**base, "death_date": "2023-12-02T00:00:00"})["possible_duplicates"] == []
+    assert create(client, admin_headers, **{**base, "tribe": "غيرهم"})["possible_duplicates"] == []
+
+    response = client.put(f"/martyrs/{original['id']}/status", json={"status": "rejected"}, headers=admin_headers)
+    assert response.status_code == 200
+    assert create(client, admin_headers, **base)["possible_duplicates"] == []
+
+
+def test_unknown_records_are_404(client, admin_headers):
+    assert client.get("/admin/duplicates/martyrs/999999", headers=admin_headers).status_code == 404
+    assert client.get("/admin/duplicates/soldiers/1", headers=admin_headers).status_code == 404
@@ -0,0 +1,35 @@
+"""Bulk export: only the allowlisted public columns of approved records"""
+
+import csv
+import io
+import json
+
+from conftest import seed_martyrs
+from export import EXPORT_COLUMNS
+from records import RECORD_TYPES
+
+PRIVATE = {"contact_family", "family_contact", "added_by_user_id", "admin_notes",
+           "search_text", "dedupe_key", "status", "cv_file_path"}
+
+
+def test_allowlists_name_real_columns_and_no_private_ones():
+    for name, columns in EXPORT_COLUMNS.items():
+        table_columns = RECORD_TYPES[name].model.__table__.columns
+        assert all(column in table_columns for column in columns)
+        assert not PRIVATE & set(columns)
+
+
+def test_exports_carry_only_public_columns(client, admin_headers, db_engine):
+    with db_engine.begin() as conn:
+        seed_martyrs(conn, 3, status="approved")
+
+    response = client.get("/admin/export/martyrs", params={"format": "csv"}, headers=admin_headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "text/csv; charset=utf-8"
+    header = next(csv.reader(io.StringIO(response.content.decode("utf-8-sig"))))
+    assert header == list(EXPORT_COLUMNS["martyrs"])
+
+    response = client.get("/admin/export/martyrs", params={"format": "ndjson"}, headers=admin_headers)
+    assert response.headers["content-type"] == "application/x-ndjson"
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert rows and all(set(row) == set(EXPORT_COLUMNS["martyrs"]) for row in rows)
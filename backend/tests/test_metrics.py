@@ -0,0 +1,11 @@
+"""/metrics: pool and session internals are for admins only"""
+
+
+def test_metrics_require_an_admin(client, admin_headers, regular_user):
+    _, headers = regular_user
+    assert client.get("/metrics").status_code == 403
+    assert client.get("/metrics", headers=headers).status_code == 403
+
+    response = client.get("/metrics", headers=admin_headers)
+    assert response.status_code == 200
+    assert {"password_hashing", "database_pool", "moderation_subscribers"} <= set(response.json())
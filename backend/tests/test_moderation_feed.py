@@ -0,0 +1,35 @@
+"""Moderation WebSocket: the token travels in the first message, never the URL"""
+
+import pytest
+from starlette.websockets import WebSocketDisconnect
+
+
+def test_admin_receives_events_after_authenticating(client, admin_headers):
+    token = admin_headers["Authorization"].split()[1]
+    with client.websocket_connect("/ws/moderation") as websocket:
+        websocket.send_json({"token": token})
+        martyr = {
+            "full_name": "live event", "tribe": "t", "death_date": "2024-01-01T00:00:00",
+            "death_place": "p", "cause_of_death": "c", "contact_family": "f",
+        }
+        created = client.post("/martyrs", json=martyr, headers=admin_headers).json()
+        event = websocket.receive_json()
+    assert event["type"] == "created" and event["ids"] == [created["id"]]
+
+
+@pytest.mark.parametrize("first_message", [{"token": "not-a-jwt"}, {"no": "token"}, ["token"]])
+def test_bad_first_message_closes_the_socket(client, first_message):
+    with client.websocket_connect("/ws/moderation") as websocket:
+        websocket.send_json(first_message)
+        with pytest.raises(WebSocketDisconnect) as closed:
+            websocket.receive_json()
+    assert closed.value.code == 1008
+
+
+def test_regular_users_are_refused(client, regular_user):
+    _, headers = regular_user
+    with client.websocket_connect("/ws/moderation") as websocket:
+        websocket.send_json({"token": headers["Authorization"].split()[1]})
+        with pytest.raises(WebSocketDisconnect) as closed:
+            websocket.receive_json()
+    assert closed.value.code == 1008
@@ -0,0 +1,86 @@
+"""Keyset pagination: complete, stable paging and index-seek query plans"""
+
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, text
+
+from conftest import seed_martyrs
+from models import Martyr
+from pagination import NEXT_CURSOR_HEADER, apply_cursor, encode_cursor, keyset_order
+from schemas import MartyrResponse
+from serialization import response_columns
+
+
+def _plan(conn, query):
+    sql = query.compile(conn, compile_kwargs={"literal_binds": True})
+    return [row[-1] for row in conn.execute(text(f"EXPLAIN QUERY PLAN {sql}"))]
+
+
+def _listing(status, cursor=None):
+    """The page statement GET /martyrs runs for an admin filtering by status"""
+    columns = response_columns(Martyr, MartyrResponse)
+    query = keyset_order(select(*columns).where(Martyr.status == status), Martyr)
+    return apply_cursor(query, Martyr, cursor).limit(100)
+
+
+def test_cursor_pages_cover_every_row_once(client, admin_headers, db_engine):
+    with db_engine.begin() as conn:
+        seed_martyrs(conn, 30, status="paging", created_at=datetime(2024, 3, 1))
+        # Ties on created_at must be broken by id, neither skipped nor repeated
+        seed_martyrs(conn, 25, status="paging", created_at=datetime(2024, 2, 1), step=timedelta(0))
+        expected = conn.execute(
+            select(Martyr.id).where(Martyr.status == "paging")
+            .order_by(Martyr.created_at.desc(), Martyr.id.desc())
+        ).scalars().all()
+
+    seen, cursor = [], None
+    while True:
+        params = {"status": "paging", "limit": 7}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get("/martyrs", params=params, headers=admin_headers)
+        assert response.status_code == 200, response.text
+        seen += [item["id"] for item in response.json()]
+        cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        if cursor is None:
+            break
+
+    assert seen == expected
+
+
+def test_invalid_cursor_is_rejected(client, admin_headers):
+    response = client.get("/martyrs", params={"cursor": "not-a-cursor"}, headers=admin_headers)
+    assert response.status_code == 400
+
+
+def test_deep_page_seeks_the_same_index_as_the_first(client, db_engine):
+    with db_engine.begin() as conn:
+        seed_martyrs(conn, 5000, status="deep")
+        conn.execute(text("ANALYZE"))
+        ids = conn.execute(
+            select(Martyr.id, Martyr.created_at).where(Martyr.status == "deep")
+            .order_by(Martyr.created_at.desc(), Martyr.id.desc())
+        ).all()
+        deep_row = ids[-150]
+
+        first = _plan(conn, _listing("deep"))
+        deep = _plan(conn, _listing("deep", encode_cursor(deep_row.created_at, deep_row.id)))
+
+    # Both pages walk the (status, created_at, id) index in order: no sort step,
+    # and the deep page starts from a range seek instead of skipping rows
+    assert len(first) == len(deep) == 1
+    assert "ix_martyrs_status_created_id (status=?)" in first[0]
+    assert "ix_martyrs_status_created_id (status=? AND created_at<?)" in deep[0]
+    assert not any("TEMP B-TREE" in step for step in first + deep)
+
+
+def test_deep_page_reads_only_its_own_rows(client, db_engine):
+    with db_engine.begin() as conn:
+        seed_martyrs(conn, 300, status="window")
+        rows = conn.execute(_listing("window")).all()
+        last = rows[-1]
+        second = conn.execute(_listing("window", encode_cursor(last.created_at, last.id))).all()
+
+    assert len(rows) == 100
+    assert second[0].id < last.id and len(second) == 100
+    assert {row.id for row in rows}.isdisjoint(row.id for row in second)
@@ -0,0 +1,73 @@
+"""Name search: Arabic spelling variants, FTS5 trigger sync, short-query fallback, scoping"""
+
+import uuid
+
+from conftest import martyr_payload
+
+
+def search(client, headers, q, **params):
+    response = client.get("/search", params={"q": q, **params}, headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def ids(results, record_type="martyrs"):
+    return [result["id"] for result in results if result["record_type"] == record_type]
+
+
+def create(client, headers, **values):
+    response = client.post("/martyrs", json=martyr_payload(**values), headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()["id"]
+
+
+def test_spelling_variants_match(client, admin_headers):
+    record = create(client, admin_headers, full_name="إسماعيل عبد الرؤوف", nickname="أبو زُهير", tribe="الطَّحاينة")
+    for q in ("اسماعيل", "إسماعيل", "ابو زهير", "الطحاينه"):
+        assert record in ids(search(client, admin_headers, q)), q
+
+
+def test_index_follows_inserts_and_deletes(client, admin_headers):
+    assert search(client, admin_headers, "قنديلوف") == []
+    record = create(client, admin_headers, full_name="سليم قنديلوف")
+    results = search(client, admin_headers, "قنديلوف")
+    assert ids(results) == [record]
+    assert results[0]["full_name"] == "سليم قنديلوف" and results[0]["status"] == "pending"
+
+    assert client.delete(f"/admin/records/martyrs/{record}", headers=admin_headers).status_code == 200
+    assert search(client, admin_headers, "قنديلوف") == []
+
+
+def test_queries_shorter_than_a_trigram_fall_back_to_like(client, admin_headers):
+    record = create(client, admin_headers, full_name="ظغ xq")
+    assert record in ids(search(client, admin_headers, "ظغ"))
+    assert record in ids(search(client, admin_headers, "xq"))
+    # LIKE wildcards in the query are literal characters
+    assert search(client, admin_headers, "%_") == []
+
+
+def test_results_are_limited_to_the_requested_types(client, admin_headers):
+    record = create(client, admin_headers, full_name="نعمان بركاتوف")
+    assert ids(search(client, admin_headers, "بركاتوف", types="martyrs")) == [record]
+    assert search(client, admin_headers, "بركاتوف", types="injured,prisoners") == []
+    response = client.get("/search", params={"q": "x", "types": "soldiers"}, headers=admin_headers)
+    assert response.status_code == 404
+
+
+def test_regular_users_only_find_their_own_records(client, admin_headers, regular_user):
+    _, own_headers = regular_user
+    record = create(client, own_headers, full_name="وديع مرجانوف")
+
+    assert ids(search(client, own_headers, "مرجانوف")) == [record]
+    assert ids(search(client, admin_headers, "مرجانوف")) == [record]
+    username = f"other-{uuid.uuid4().hex[:12]}"
+    other = client.post("/auth/register", json={
+        "username": username, "password": "secret1", "full_name": "Other", "user_type": "regular",
+    })
+    assert other.status_code == 200
+    token = client.post("/auth/login", json={"username": username, "password": "secret1"}).json()["access_token"]
+    assert search(client, {"Authorization": f"Bearer {token}"}, "مرجانوف") == []
+
+
+def test_punctuation_only_queries_match_nothing(client, admin_headers):
+    assert search(client, admin_headers, "!!!") == []
@@ -0,0 +1,30 @@
+"""Sparse fieldsets: requested columns only, with bounded plan caches"""
+
+from itertools import combinations
+
+from models import Martyr
+from schemas import MartyrResponse
+from serialization import PLAN_CACHE_SIZE, _output_plan, parse_fields, response_columns
+
+
+def test_fields_narrow_the_listing(client, admin_headers):
+    response = client.get("/martyrs", params={"fields": "full_name,status", "limit": 5}, headers=admin_headers)
+    assert response.status_code == 200
+    assert all(set(item) == {"id", "full_name", "status"} for item in response.json())
+
+
+def test_unknown_fields_are_rejected(client, admin_headers):
+    response = client.get("/martyrs", params={"fields": "full_name,password"}, headers=admin_headers)
+    assert response.status_code == 400
+
+
+def test_plan_caches_stay_bounded():
+    names = list(MartyrResponse.model_fields)
+    tried = list(combinations(names, 3))[:PLAN_CACHE_SIZE * 2]
+    assert len(tried) == PLAN_CACHE_SIZE * 2
+    for combination in tried:
+        fields = parse_fields(",".join(combination), MartyrResponse)
+        response_columns(Martyr, MartyrResponse, fields)
+        _output_plan(Martyr, MartyrResponse, fields)
+    assert response_columns.cache_info().currsize <= PLAN_CACHE_SIZE
+    assert _output_plan.cache_info().currsize <= PLAN_CACHE_SIZE
@@ -0,0 +1,37 @@
+"""Serving /uploads: only accepted types, never sniffed, documents as downloads"""
+
+import os
+
+from conftest import png_bytes, upload
+from uploads import upload_dir
+
+
+def test_images_are_served_inline_without_sniffing(client, admin_headers):
+    stored = upload(client, admin_headers, "photo", "i.png", png_bytes("white"), "image/png").json()
+    response = client.get(stored["file_path"])
+    assert response.headers["content-type"] == "image/png"
+    assert response.headers["x-content-type-options"] == "nosniff"
+    assert "content-disposition" not in response.headers
+
+
+def test_documents_are_served_as_attachments(client, admin_headers):
+    stored = upload(client, admin_headers, "document", "d.pdf", b"%PDF-1.4 doc", "application/pdf").json()
+    for headers in ({}, {"Range": "bytes=0-3"}):
+        response = client.get(stored["file_path"], headers=headers)
+        assert response.status_code in (200, 206)
+        assert response.headers["content-type"] == "application/pdf"
+        assert response.headers["content-disposition"] == "attachment"
+        assert response.headers["x-content-type-options"] == "nosniff"
+
+
+def test_other_types_are_not_served(client):
+    # e.g. a file stored with a client-chosen extension before uploads were fixed
+    legacy = os.path.join(upload_dir("photos"), "legacy.html")
+    with open(legacy, "w") as f:
+        f.write("<script>alert(1)</script>")
+    assert client.get("/uploads/photos/legacy.html").status_code == 404
+
+
+def test_thumbnail_under_missing_shard_is_404(client):
+    response = client.get(f"/uploads/photos/ab/cd/{'ab' * 32}_80.webp")
+    assert response.status_code == 404
@@ -0,0 +1,102 @@
+"""Delta sync: token round trip, ISO timestamps with offsets, tombstones"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+import httpx
+
+import sync as sync_module
+from conftest import seed_martyrs
+from database import write_lock
+from main import app
+from sync import decode_since
+
+
+def sync(client, headers, since=None, limit=500):
+    params = {"limit": limit}
+    if since:
+        params["since"] = since
+    response = client.get("/sync", params=params, headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_token_round_trip_sends_every_change_once(client, regular_user, db_engine):
+    user_id, headers = regular_user
+    with db_engine.begin() as conn:
+        seed_martyrs(conn, 7, user_id=user_id, created_at=datetime(2024, 5, 1))
+
+    seen, since = [], None
+    while True:
+        page = sync(client, headers, since, limit=3)
+        seen += [martyr["id"] for martyr in page["martyrs"]]
+        since = page["next_since"]
+        if not page["has_more"]:
+            break
+
+    assert len(seen) == 7 and len(set(seen)) == 7
+    assert sync(client, headers, since)["martyrs"] == []
+
+
+def test_iso_since_accepts_utc_offsets(client, regular_user, db_engine):
+    user_id, headers = regular_user
+    with db_engine.begin() as conn:
+        seed_martyrs(conn, 2, user_id=user_id, created_at=datetime(2024, 1, 1, 12))
+
+    naive = sync(client, headers, "2024-01-01T11:00:00")
+    assert len(naive["martyrs"]) == 2
+    for since in ("2024-01-01T11:00:00Z", "2024-01-01T14:00:00+03:00"):
+        assert sync(client, headers, since)["martyrs"] == naive["martyrs"]
+    assert sync(client, headers, "2024-01-01T12:30:00Z")["martyrs"] == []
+
+
+def test_positions_are_naive_utc():
+    positions = decode_since("2024-01-01T03:00:00+03:00")
+    assert positions["martyrs"] == (datetime(2024, 1, 1), 0)
+
+
+def test_invalid_token_is_rejected(client, admin_headers):
+    response = client.get("/sync", params={"since": "%%%"}, headers=admin_headers)
+    assert response.status_code == 400
+
+
+def test_deletions_arrive_as_tombstones(client, admin_headers, regular_user, db_engine):
+    user_id, headers = regular_user
+    with db_engine.begin() as conn:
+        seed_martyrs(conn, 2, user_id=user_id, created_at=datetime(2024, 6, 1))
+    first = sync(client, headers)
+    doomed = first["martyrs"][0]["id"]
+
+    response = client.delete(f"/admin/records/martyrs/{doomed}", headers=admin_headers)
+    assert response.status_code == 200
+
+    after = sync(client, headers, first["next_since"])
+    assert after["deleted"]["martyrs"] == [doomed]
+
+
+def test_writes_queued_behind_the_writer_lock_are_not_skipped(client, admin_headers, regular_user,
+                                                              db_engine, monkeypatch):
+    user_id, headers = regular_user
+    with db_engine.begin() as conn:
+        seed_martyrs(conn, 1, user_id=user_id, created_at=datetime(2024, 7, 1))
+    record = sync(client, headers)["martyrs"][0]["id"]
+    # Keep the test short: the write waits on the lock far longer than the settle margin
+    monkeypatch.setattr(sync_module, "SYNC_SETTLE", timedelta(milliseconds=100))
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as api:
+            async with write_lock():
+                queued = asyncio.create_task(api.put(
+                    "/admin/status/batch", headers=admin_headers,
+                    json={"status": "approved", "martyr_ids": [record]},
+                ))
+                await asyncio.sleep(0.5)
+                # Taken while the status change waits for the writer queue
+                polled = await api.get("/sync", headers=headers)
+            assert (await queued).status_code == 200
+            return polled.json()["next_since"]
+
+    since = client.portal.call(scenario)
+    changed = sync(client, headers, since)["martyrs"]
+    assert [(martyr["id"], martyr["status"]) for martyr in changed] == [(record, "approved")]
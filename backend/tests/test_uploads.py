@@ -0,0 +1,114 @@
+"""Upload storage: extensions from the content type, per-kind dedup, orphan purge"""
+
+import asyncio
+import os
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, update
+
+from conftest import png_bytes, upload
+from models import UploadedFile
+from uploads import storage_path
+
+
+def test_extension_comes_from_the_content_type(client, admin_headers):
+    response = upload(client, admin_headers, "photo", "x.html", png_bytes("red"), "image/png")
+    assert response.status_code == 200, response.text
+    assert response.json()["file_path"].endswith(".png")
+
+
+def test_returned_paths_are_servable_urls(client, admin_headers):
+    # conftest points UPLOAD_PATH at an absolute temporary directory
+    content = png_bytes("blue")
+    stored = upload(client, admin_headers, "photo", "p.png", content, "image/png").json()
+    assert stored["file_path"].startswith("/uploads/photos/")
+    assert client.get(stored["file_path"]).content == content
+
+    martyr = {
+        "full_name": "with photo", "tribe": "t", "death_date": "2024-01-01T00:00:00",
+        "death_place": "p", "cause_of_death": "c", "contact_family": "f",
+        "photo_path": stored["file_path"],
+    }
+    created = client.post("/martyrs", json=martyr, headers=admin_headers).json()
+    thumbnails = created["photo_thumbnails"]
+    assert thumbnails["80"] == stored["file_path"][:-len(".png")] + "_80.webp"
+    # Served as soon as generated, or the original until then
+    assert client.get(thumbnails["80"]).status_code == 200
+
+
+def test_only_allowed_image_types_are_accepted(client, admin_headers):
+    svg = b'<svg xmlns="http://www.w3.org/2000/svg"><script>alert(1)</script></svg>'
+    response = upload(client, admin_headers, "photo", "x.svg", svg, "image/svg+xml")
+    assert response.status_code == 400
+
+
+def test_same_bytes_are_stored_per_kind(client, admin_headers):
+    content = png_bytes("green")
+    photo = upload(client, admin_headers, "photo", "a.png", content, "image/png").json()
+    document = upload(client, admin_headers, "document", "a.pdf", content, "application/pdf").json()
+    again = upload(client, admin_headers, "document", "b.pdf", content, "application/pdf").json()
+
+    assert "/photos/" in photo["file_path"]
+    assert "/documents/" in document["file_path"] and document["file_path"].endswith(".pdf")
+    assert again["deduplicated"] and again["file_path"] == document["file_path"]
+
+
+def _age(db_engine, sha256, days=2):
+    with db_engine.begin() as conn:
+        conn.execute(
+            update(UploadedFile).where(UploadedFile.sha256 == sha256)
+            .values(created_at=datetime.utcnow() - timedelta(days=days))
+        )
+
+
+def _stored(db_engine, sha256):
+    with db_engine.connect() as conn:
+        return conn.execute(select(UploadedFile).where(UploadedFile.sha256 == sha256)).all()
+
+
+def test_purge_removes_only_old_unreferenced_blobs(client, admin_headers, db_engine):
+    orphan = upload(client, admin_headers, "document", "o.pdf", b"%PDF orphan", "application/pdf").json()
+    fresh = upload(client, admin_headers, "document", "f.pdf", b"%PDF fresh", "application/pdf").json()
+    kept = upload(client, admin_headers, "document", "k.pdf", b"%PDF kept", "application/pdf").json()
+    martyr = {
+        "full_name": "referenced", "tribe": "t", "death_date": "2024-01-01T00:00:00",
+        "death_place": "p", "cause_of_death": "c", "contact_family": "f",
+        "cv_file_path": kept["file_path"],
+    }
+    assert client.post("/martyrs", json=martyr, headers=admin_headers).status_code == 200
+    _age(db_engine, orphan["sha256"])
+    _age(db_engine, kept["sha256"])
+
+    response = client.post("/admin/uploads/purge", headers=admin_headers)
+    assert response.status_code == 200
+    assert response.json()["purged"] >= 1
+
+    assert not _stored(db_engine, orphan["sha256"])
+    assert not os.path.exists(storage_path(orphan["file_path"]))
+    assert _stored(db_engine, fresh["sha256"]) and os.path.exists(storage_path(fresh["file_path"]))
+    assert _stored(db_engine, kept["sha256"]) and os.path.exists(storage_path(kept["file_path"]))
+
+
+def test_purge_queues_behind_other_writers(client, admin_headers, db_engine):
+    from database import AsyncSessionLocal, write_lock
+    from models import User
+    from uploads import purge_unreferenced
+
+    orphan = upload(client, admin_headers, "document", "q.pdf", b"%PDF queued", "application/pdf").json()
+    _age(db_engine, orphan["sha256"])
+
+    async def scenario():
+        async with AsyncSessionLocal() as writer_db, AsyncSessionLocal() as purge_db:
+            async def writer():
+                async with write_lock():
+                    # The purge starts while this writer holds the queue
+                    await asyncio.sleep(0.2)
+                    await writer_db.execute(update(User).where(User.id == 1).values(last_login=datetime.utcnow()))
+                    await writer_db.commit()
+
+            return await asyncio.gather(writer(), purge_unreferenced(purge_db))
+
+    # On the app's event loop, which owns the writer queue
+    _, purged = client.portal.call(scenario)
+    assert purged >= 1
+    assert not _stored(db_engine, orphan["sha256"])
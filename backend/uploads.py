@@ -0,0 +1,273 @@
+"""
+File upload storage for Palestine Martyrs API
+Content-addressed store: files are streamed to disk in fixed-size chunks
+and kept once per distinct SHA-256 and kind, under a sharded directory layout
+
+Blobs no record points at (ref_count 0) are purged once they are older than
+UPLOAD_ORPHAN_TTL, which leaves clients time to create the record after
+uploading.
+"""
+
+import asyncio
+import hashlib
+import logging
+import mimetypes
+import os
+import uuid
+from datetime import datetime, timedelta
+from typing import NamedTuple, Optional, Tuple
+
+import aiofiles
+import aiofiles.os
+from fastapi import HTTPException, UploadFile
+from sqlalchemy import delete, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import get_settings
+from database import write_lock
+from models import UploadedFile
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+UPLOAD_KINDS = ("photos", "documents")
+
+# Served by GET /uploads/{path}; records and clients refer to files by this URL
+UPLOAD_URL_PREFIX = "/uploads/"
+
+_purger: Optional[asyncio.Task] = None
+
+# Stored extension per accepted content type; the client's filename is never used
+EXTENSIONS = {
+    "image/jpeg": ".jpg",
+    "image/png": ".png",
+    "image/gif": ".gif",
+    "application/pdf": ".pdf",
+    "application/msword": ".doc",
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document": ".docx",
+}
+
+
+class StoredFile(NamedTuple):
+    path: str
+    size: int
+    sha256: str
+
+
+def upload_dir(kind: str) -> str:
+    """Directory for an upload kind ('photos' or 'documents')"""
+    return os.path.normpath(os.path.join(settings.upload_path, kind))
+
+
+def upload_url(path: str) -> str:
+    """Public /uploads/... URL of a stored file; URLs pass through unchanged"""
+    if path.startswith(UPLOAD_URL_PREFIX):
+        return path
+    relative = os.path.relpath(path, settings.upload_path)
+    return UPLOAD_URL_PREFIX + relative.replace(os.sep, "/")
+
+
+def storage_path(reference: str) -> str:
+    """uploaded_files.path of a file referenced by URL; paths pass through unchanged"""
+    if not reference.startswith(UPLOAD_URL_PREFIX):
+        return reference
+    kind, *rest = reference[len(UPLOAD_URL_PREFIX):].split("/")
+    return os.path.join(upload_dir(kind), *rest)
+
+
+def ensure_upload_dirs() -> None:
+    """Create the upload directories; run at startup rather than on import"""
+    for kind in UPLOAD_KINDS:
+        os.makedirs(upload_dir(kind), exist_ok=True)
+
+
+async def stream_to_disk(file: UploadFile, destination: str, max_size: int = None) -> StoredFile:
+    """Copy an upload to `destination` chunk by chunk, hashing as it goes
+
+    Memory use is bounded by the chunk size. The data lands in a temporary
+    file first, so an oversized or failed upload never leaves a partial file
+    at `destination`.
+    """
+    max_size = settings.max_file_size if max_size is None else max_size
+    chunk_size = settings.upload_chunk_size
+    directory = os.path.dirname(destination) or "."
+    await aiofiles.os.makedirs(directory, exist_ok=True)
+
+    temp_path = os.path.join(directory, f".{uuid.uuid4().hex}.part")
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        async with aiofiles.open(temp_path, "wb") as buffer:
+            while True:
+                chunk = await file.read(chunk_size)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_size:
+                    raise _too_large(max_size)
+                digest.update(chunk)
+                await buffer.write(chunk)
+        await aiofiles.os.replace(temp_path, destination)
+    except BaseException:
+        if await aiofiles.os.path.exists(temp_path):
+            await aiofiles.os.remove(temp_path)
+        raise
+
+    return StoredFile(path=destination, size=size, sha256=digest.hexdigest())
+
+
+def _too_large(max_size: int) -> HTTPException:
+    return HTTPException(
+        status_code=413,
+        detail=f"File exceeds the maximum size of {max_size} bytes",
+    )
+
+
+def extension_for(content_type: Optional[str]) -> str:
+    """File extension for a validated content type ('' if unknown)"""
+    return EXTENSIONS.get(content_type) or mimetypes.guess_extension(content_type or "") or ""
+
+
+def content_path(kind: str, sha256: str, content_type: str = None) -> str:
+    """Sharded location of a blob: <kind>/ab/cd/abcd...<ext>"""
+    extension = extension_for(content_type)
+    return os.path.join(upload_dir(kind), sha256[:2], sha256[2:4], sha256 + extension)
+
+
+async def hash_upload(file: UploadFile, max_size: int = None) -> Tuple[str, int]:
+    """SHA-256 and size of an upload, read in chunks without writing anything"""
+    max_size = settings.max_file_size if max_size is None else max_size
+    digest = hashlib.sha256()
+    size = 0
+    while True:
+        chunk = await file.read(settings.upload_chunk_size)
+        if not chunk:
+            break
+        size += len(chunk)
+        if size > max_size:
+            raise _too_large(max_size)
+        digest.update(chunk)
+    await file.seek(0)
+    return digest.hexdigest(), size
+
+
+async def store_upload(db: AsyncSession, file: UploadFile, kind: str) -> Tuple[UploadedFile, bool]:
+    """Store an upload once per content; returns (record, newly_written)
+
+    The content is hashed first, so a duplicate of the same kind is
+    answered from the uploaded_files index without writing to disk.
+    """
+    sha256, size = await hash_upload(file)
+    existing = await db.get(UploadedFile, (sha256, kind))
+    if existing is not None:
+        return existing, False
+
+    path = content_path(kind, sha256, file.content_type)
+    await stream_to_disk(file, path)
+
+    record = UploadedFile(
+        sha256=sha256,
+        kind=kind,
+        path=path,
+        size=size,
+        content_type=file.content_type,
+        ref_count=0,
+        created_at=datetime.utcnow(),
+    )
+    db.add(record)
+    try:
+        await db.commit()
+    except IntegrityError:
+        # Same content uploaded concurrently; the file on disk is identical
+        await db.rollback()
+        return await db.get(UploadedFile, (sha256, kind)), False
+    return record, True
+
+
+async def retain_files(db: AsyncSession, *paths: str) -> None:
+    """Count references from a record to stored files (flushed on commit)"""
+    paths = [storage_path(path) for path in paths if path]
+    if not paths:
+        return
+    files = (await db.scalars(select(UploadedFile).where(UploadedFile.path.in_(paths)))).all()
+    for stored in files:
+        stored.ref_count = UploadedFile.ref_count + paths.count(stored.path)
+
+
+async def release_files(db: AsyncSession, *paths: str) -> None:
+    """Drop references when a record stops pointing at stored files"""
+    paths = [storage_path(path) for path in paths if path]
+    if not paths:
+        return
+    files = (await db.scalars(select(UploadedFile).where(UploadedFile.path.in_(paths)))).all()
+    for stored in files:
+        stored.ref_count = UploadedFile.ref_count - paths.count(stored.path)
+
+
+def _remove_blob(stored: UploadedFile) -> None:
+    from images import thumbnail_path
+
+    paths = [stored.path]
+    if stored.kind == "photos":
+        paths += [thumbnail_path(stored.path, size) for size in settings.thumbnail_sizes]
+    for path in paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+async def purge_unreferenced(db: AsyncSession, older_than: timedelta = None) -> int:
+    """Delete blobs (and photo variants) no record references; returns the count
+
+    Only blobs older than `older_than` (UPLOAD_ORPHAN_TTL by default) go, so
+    an upload whose record has not been created yet is kept.
+    """
+    older_than = timedelta(seconds=settings.upload_orphan_ttl) if older_than is None else older_than
+    cutoff = datetime.utcnow() - older_than
+    candidates = (await db.scalars(
+        select(UploadedFile).where(UploadedFile.ref_count <= 0, UploadedFile.created_at < cutoff)
+    )).all()
+    purged = 0
+    for stored in candidates:
+        # Re-check the count in the DELETE: a record may have claimed it meanwhile
+        async with write_lock():
+            result = await db.execute(
+                delete(UploadedFile).where(
+                    UploadedFile.sha256 == stored.sha256,
+                    UploadedFile.kind == stored.kind,
+                    UploadedFile.ref_count <= 0,
+                ).execution_options(synchronize_session=False)
+            )
+            await db.commit()
+        if result.rowcount:
+            await asyncio.to_thread(_remove_blob, stored)
+            purged += 1
+    return purged
+
+
+async def _purge_periodically(session_factory) -> None:
+    while True:
+        await asyncio.sleep(settings.upload_purge_interval)
+        try:
+            async with session_factory() as db:
+                purged = await purge_unreferenced(db)
+            if purged:
+                logger.info("Purged %d unreferenced uploads", purged)
+        except Exception:
+            logger.exception("Unreferenced upload purge failed")
+
+
+def start_purger(session_factory) -> None:
+    """Run purge_unreferenced every UPLOAD_PURGE_INTERVAL seconds (0 disables)"""
+    global _purger
+    if _purger is None and settings.upload_purge_interval > 0:
+        _purger = asyncio.create_task(_purge_periodically(session_factory))
+
+
+def stop_purger() -> None:
+    global _purger
+    if _purger is not None:
+        _purger.cancel()
+        _purger = None